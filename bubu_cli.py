@@ -6,7 +6,6 @@ Just like in those beautiful Bollywood movies where love finds a way,
 this CLI tool helps you express your feelings through automated messages! 💕
 """
 
-import asyncio
 import sys
 from datetime import date, datetime
 from typing import Optional, Dict, Any
@@ -24,6 +23,7 @@ from utils import (
     config,
     MessageScheduler,
     get_logger,
+    run_async,
     setup_logging
 )
 from utils.compose_refactored import create_message_composer_refactored
@@ -92,7 +92,7 @@ class BubuCLI:
         
         # Check messenger availability
         try:
-            messenger_available = asyncio.run(self.scheduler.messenger.is_available())
+            messenger_available = run_async(self.scheduler.messenger.is_available())
             status = "🟢 Healthy" if messenger_available else "🟡 Degraded"
         except Exception:
             status = "🔴 Unhealthy"
@@ -290,14 +290,14 @@ class BubuCLI:
             elif choice == "3":
                 message_type = Prompt.ask("Message type", choices=["morning", "flirty", "night"])
                 count = int(Prompt.ask("Number of previews", default="1"))
-                asyncio.run(self.preview_messages(message_type, count))
+                run_async(self.preview_messages(message_type, count))
             elif choice == "4":
                 message_type = Prompt.ask("Message type", choices=["morning", "flirty", "night"])
                 custom = Prompt.ask("Custom message (press Enter to generate)", default="")
                 custom = custom if custom.strip() else None
-                asyncio.run(self.send_message_now(message_type, custom))
+                run_async(self.send_message_now(message_type, custom))
             elif choice == "5":
-                asyncio.run(self.dry_run())
+                run_async(self.dry_run())
             elif choice == "6":
                 days = int(Prompt.ask("Number of days", default="7"))
                 self.show_recent_messages(days)
@@ -345,7 +345,7 @@ def preview(message_type, count):
     """Preview messages without sending."""
     print_banner()
     bubu = BubuCLI()
-    asyncio.run(bubu.preview_messages(message_type, count))
+    run_async(bubu.preview_messages(message_type, count))
 
 
 @cli.command()
@@ -357,7 +357,7 @@ def send(message_type, message):
     """Send a message immediately."""
     print_banner()
     bubu = BubuCLI()
-    asyncio.run(bubu.send_message_now(message_type, message))
+    run_async(bubu.send_message_now(message_type, message))
 
 
 @cli.command()
@@ -365,7 +365,7 @@ def dry_run():
     """Show what messages would be sent today without actually sending."""
     print_banner()
     bubu = BubuCLI()
-    asyncio.run(bubu.dry_run())
+    run_async(bubu.dry_run())
 
 
 @cli.command()
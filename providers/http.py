@@ -0,0 +1,75 @@
+"""Shared HTTP client settings for Bubu Agent providers."""
+
+import asyncio
+from typing import Any, Optional
+
+import httpx
+
+# Each provider keeps one client for its lifetime, so connections (and their
+# TLS sessions) are reused across messages instead of re-established per call
+HTTP_LIMITS = httpx.Limits(
+    max_keepalive_connections=20,
+    max_connections=100,
+    keepalive_expiry=30.0
+)
+
+
+class LoopBoundClient:
+    """Pooled AsyncClient that follows the running event loop.
+
+    Pooled connections belong to the loop that opened them, so a client
+    reused from a second ``asyncio.run`` (as the CLI does per action) fails
+    with "Event loop is closed". This keeps one AsyncClient per loop and
+    starts a fresh one whenever the running loop changes.
+    """
+
+    def __init__(self, **kwargs: Any):
+        self._kwargs = kwargs
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The AsyncClient for the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # The previous client's connections died with their loop
+            self._client = httpx.AsyncClient(limits=HTTP_LIMITS, **self._kwargs)
+            self._loop = loop
+        return self._client
+
+    @property
+    def is_closed(self) -> bool:
+        """Whether the current client is closed (or was never opened)."""
+        return self._client is None or self._client.is_closed
+
+    def get(self, *args: Any, **kwargs: Any):
+        return self.client.get(*args, **kwargs)
+
+    def post(self, *args: Any, **kwargs: Any):
+        return self.client.post(*args, **kwargs)
+
+    def stream(self, *args: Any, **kwargs: Any):
+        return self.client.stream(*args, **kwargs)
+
+    async def aclose(self) -> None:
+        """Close the client; one from an earlier loop is just dropped."""
+        if self._client is None:
+            return
+        if self._loop is asyncio.get_running_loop():
+            await self._client.aclose()
+        else:
+            self._client = self._loop = None
+
+
+def create_http_client(**kwargs) -> LoopBoundClient:
+    """Create a long-lived client with the shared connection limits.
+
+    Args:
+        **kwargs: Extra httpx.AsyncClient options (timeout, auth, headers,
+            transport)
+
+    Returns:
+        Configured loop-bound client; the owner must close it
+    """
+    return LoopBoundClient(**kwargs)
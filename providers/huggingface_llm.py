@@ -7,6 +7,9 @@ from typing import Any, Dict, List, Optional
 
 import httpx
 from utils import get_logger, scrub_secrets_from_logs
+from utils.types import MessageType
+
+from .http import create_http_client
 
 logger = get_logger(__name__)
 
@@ -20,19 +23,21 @@ class HuggingFaceLLM:
         model_id: str,
         base_url: str = "https://api-inference.huggingface.co",
         timeout: int = 30,
-        max_retries: int = 3
+        max_retries: int = 3,
+        transport: Optional[httpx.AsyncBaseTransport] = None
     ):
         self.api_key = api_key
         self.model_id = model_id
         self.base_url = base_url
         self.timeout = timeout
         self.max_retries = max_retries
-        self.client = httpx.AsyncClient(
+        self._client = create_http_client(
             timeout=timeout,
             headers={
                 "Authorization": f"Bearer {api_key}",
                 "Content-Type": "application/json"
-            }
+            },
+            transport=transport
         )
     
     async def generate_text(
@@ -42,7 +47,8 @@ class HuggingFaceLLM:
         max_new_tokens: int = 150,
         temperature: float = 0.8,
         top_p: float = 0.9,
-        do_sample: bool = True
+        do_sample: bool = True,
+        message_type: Optional[MessageType] = None
     ) -> Optional[str]:
         """
         Generate text using Hugging Face Inference API.
@@ -54,6 +60,7 @@ class HuggingFaceLLM:
             temperature: Sampling temperature
             top_p: Top-p sampling parameter
             do_sample: Whether to use sampling
+            message_type: Message type being generated, if known (unused)
             
         Returns:
             Generated text or None if failed
@@ -84,7 +91,7 @@ class HuggingFaceLLM:
                     max_tokens=max_new_tokens
                 )
                 
-                response = await self.client.post(
+                response = await self._client.post(
                     f"{self.base_url}/models/{self.model_id}",
                     json=payload
                 )
@@ -186,7 +193,7 @@ class HuggingFaceLLM:
     async def is_available(self) -> bool:
         """Check if the Hugging Face API is available."""
         try:
-            response = await self.client.get(f"{self.base_url}/models/{self.model_id}")
+            response = await self._client.get(f"{self.base_url}/models/{self.model_id}")
             return response.status_code == 200
         except Exception as e:
             logger.error(
@@ -198,7 +205,13 @@ class HuggingFaceLLM:
     
     async def close(self):
         """Close the HTTP client."""
-        await self.client.aclose()
+        await self._client.aclose()
+    
+    async def __aenter__(self) -> "HuggingFaceLLM":
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
     
     def __repr__(self):
         return f"HuggingFaceLLM(model={self.model_id})"
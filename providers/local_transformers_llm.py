@@ -8,31 +8,63 @@ or offline usage when HF Inference is unavailable.
 from __future__ import annotations
 
 import asyncio
-from typing import Optional
+import gc
+import os
+import re
+import threading
+import time
+from typing import List, Optional, Tuple
 
-from transformers import AutoModelForCausalLM, AutoTokenizer
+from transformers import AutoModelForCausalLM, AutoModelForSeq2SeqLM, AutoTokenizer
 
-from utils.types import LLMProtocol
+from utils.types import LLMProtocol, MessageType
 from utils.utils import get_logger
 
 
 logger = get_logger(__name__)
 
 
+# Chat-template artifacts that mark a line as instruction scaffolding
+_INSTRUCT_MARKER_RE = re.compile(
+    "|".join(map(re.escape, ['<|', '|>', '[INST]', '[/INST]', '<<SYS>>', '<</SYS>>'])),
+    re.IGNORECASE,
+)
+
+# Weight-only quantizations applied with torchao after loading
+_TORCHAO_QUANTIZATIONS = ("int8_weight_only", "float8_weight_only")
+
 _CACHED_MODEL = None
 _CACHED_TOKENIZER = None
-_CACHED_MODEL_ID = None
+_CACHED_MODEL_KEY = None
+# Serializes check-and-load, so concurrent callers on a cold cache share one
+# load instead of each loading their own copy of the model
+_MODEL_LOCK = threading.Lock()
+
 
+def _ensure_model_loaded(model_id: str, quantization: Optional[str] = None):
+    with _MODEL_LOCK:
+        return _load_model_locked(model_id, quantization)
 
-def _ensure_model_loaded(model_id: str):
-    global _CACHED_MODEL, _CACHED_TOKENIZER, _CACHED_MODEL_ID
-    if _CACHED_MODEL is not None and _CACHED_MODEL_ID == model_id:
+
+def _load_model_locked(model_id: str, quantization: Optional[str] = None):
+    global _CACHED_MODEL, _CACHED_TOKENIZER, _CACHED_MODEL_KEY
+    if _CACHED_MODEL is not None and _CACHED_MODEL_KEY == (model_id, quantization):
         return _CACHED_MODEL, _CACHED_TOKENIZER
 
-    logger.info("Loading local transformers model", model_id=model_id)
+    logger.info("Loading local transformers model", model_id=model_id, quantization=quantization)
     
-    # Detect Apple Silicon and use MPS if available
     import torch
+    
+    # Free the previously cached model before loading another one, so two
+    # models are never resident at once
+    if _CACHED_MODEL is not None:
+        _CACHED_MODEL = _CACHED_TOKENIZER = _CACHED_MODEL_KEY = None
+        gc.collect()
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+        logger.info("Released previously loaded local model")
+    
+    # Detect Apple Silicon and use MPS if available
     device = None
     if torch.backends.mps.is_available():
         device = "mps"
@@ -44,10 +76,63 @@ def _ensure_model_loaded(model_id: str):
         device = "cpu"
         logger.info("Using CPU")
     
+    # Skip Hub round trips when the model is already cached locally
+    hub_kwargs = _hub_kwargs(model_id)
+    
+    # Rust-backed fast tokenizer; same for every model family
+    tokenizer = AutoTokenizer.from_pretrained(model_id, trust_remote_code=True, use_fast=True, **hub_kwargs)
+    
+    # bitsandbytes 8-bit / 4-bit kernels need CUDA; on CPU or MPS load the
+    # model unquantized instead of failing. The cache key keeps the requested
+    # quantization, so this doesn't trigger a reload on every call.
+    load_quantization = quantization
+    if quantization and quantization not in _TORCHAO_QUANTIZATIONS and device != "cuda":
+        logger.warning(
+            "bitsandbytes quantization needs CUDA, loading unquantized",
+            quantization=quantization,
+            device=device
+        )
+        load_quantization = None
+    
     # Optimized loading for different model types
-    if "mistral" in model_id.lower() or "mixtral" in model_id.lower():
+    model_key = model_id.lower()
+    if load_quantization in _TORCHAO_QUANTIZATIONS:
+        # Load in half precision, then swap Linear weights for int8/fp8 ones
+        logger.info("Loading with torchao quantization", quantization=load_quantization)
+        model = AutoModelForCausalLM.from_pretrained(
+            model_id,
+            torch_dtype=torch.bfloat16,
+            device_map="auto",
+            trust_remote_code=True,
+            **hub_kwargs,
+            low_cpu_mem_usage=True,
+        )
+        _torchao_quantize(torch, model, load_quantization)
+    elif load_quantization:
+        # bitsandbytes 8-bit / 4-bit weights for any Linear-based causal LM
+        logger.info("Loading with bitsandbytes quantization", quantization=load_quantization)
+        model = AutoModelForCausalLM.from_pretrained(
+            model_id,
+            quantization_config=_bnb_config(torch, load_quantization),
+            device_map="auto",
+            trust_remote_code=True,
+            **hub_kwargs,
+            low_cpu_mem_usage=True,
+        )
+    elif "t5" in model_key:
+        # Encoder-decoder (FLAN-T5 etc.) must load as seq2seq so generate()
+        # encodes the prompt once and caches it across decode steps
+        logger.info("Detected T5 model, loading as seq2seq")
+        model = AutoModelForSeq2SeqLM.from_pretrained(
+            model_id,
+            torch_dtype="auto",
+            trust_remote_code=True,
+            **hub_kwargs,
+            low_cpu_mem_usage=True,
+        )
+        model = model.to(device)
+    elif "mistral" in model_key or "mixtral" in model_key:
         logger.info("Detected Mistral/Mixtral model, using optimized loading")
-        tokenizer = AutoTokenizer.from_pretrained(model_id, trust_remote_code=True)
         
         # Use appropriate dtype for device
         if device == "mps":
@@ -57,6 +142,7 @@ def _ensure_model_loaded(model_id: str):
                 torch_dtype=torch.float16,
                 device_map=device,
                 trust_remote_code=True,
+                **hub_kwargs,
                 low_cpu_mem_usage=True,
             )
         else:
@@ -65,11 +151,11 @@ def _ensure_model_loaded(model_id: str):
                 torch_dtype="auto",
                 device_map="auto",
                 trust_remote_code=True,
+                **hub_kwargs,
                 low_cpu_mem_usage=True,
             )
-    elif "phi" in model_id.lower():
+    elif "phi" in model_key:
         logger.info("Detected Phi model, using optimized loading for M3")
-        tokenizer = AutoTokenizer.from_pretrained(model_id, trust_remote_code=True)
         
         # Add padding token if not present (required for Phi)
         if tokenizer.pad_token is None:
@@ -91,6 +177,7 @@ def _ensure_model_loaded(model_id: str):
                     quantization_config=quantization_config,
                     device_map="auto",
                     trust_remote_code=True,
+                    **hub_kwargs,
                     low_cpu_mem_usage=True,
                 )
             except ImportError:
@@ -100,6 +187,7 @@ def _ensure_model_loaded(model_id: str):
                     model_id,
                     torch_dtype=torch.float16,
                     trust_remote_code=True,
+                    **hub_kwargs,
                     low_cpu_mem_usage=True,
                     offload_folder="offload",
                     offload_state_dict=True,
@@ -111,36 +199,159 @@ def _ensure_model_loaded(model_id: str):
                 torch_dtype="auto",
                 device_map="auto",
                 trust_remote_code=True,
+                **hub_kwargs,
                 low_cpu_mem_usage=True,
             )
     else:
         # Default loading for other models (including DialoGPT)
-        tokenizer = AutoTokenizer.from_pretrained(model_id, trust_remote_code=True)
-        
         if device == "mps":
             # For MPS, use float16 for better performance
             model = AutoModelForCausalLM.from_pretrained(
                 model_id,
                 torch_dtype=torch.float16,
                 trust_remote_code=True,
+                **hub_kwargs,
                 low_cpu_mem_usage=True,
             )
             model = model.to(device)
         else:
-            model = AutoModelForCausalLM.from_pretrained(
-                model_id,
-                torch_dtype="auto",
-                device_map="auto" if device != "cpu" else None,
-                trust_remote_code=True,
-                low_cpu_mem_usage=True,
-            )
+            # Dynamic INT8 quantization needs float32 weights to start from
+            quantize = device == "cpu" and os.getenv("BUBU_QUANT", "").lower() == "int8"
+            if quantize:
+                dtype = torch.float32
+            else:
+                dtype = _cpu_dtype(torch) if device == "cpu" else "auto"
+            logger.info("Loading weights", dtype=str(dtype))
+            try:
+                model = AutoModelForCausalLM.from_pretrained(
+                    model_id,
+                    torch_dtype=dtype,
+                    device_map="auto" if device != "cpu" else None,
+                    trust_remote_code=True,
+                    **hub_kwargs,
+                    low_cpu_mem_usage=True,
+                )
+            except (RuntimeError, TypeError, ValueError) as e:
+                if dtype is not torch.bfloat16:
+                    raise
+                logger.warning("bf16 load failed, falling back to float32", error=str(e))
+                model = AutoModelForCausalLM.from_pretrained(
+                    model_id,
+                    torch_dtype=torch.float32,
+                    trust_remote_code=True,
+                    **hub_kwargs,
+                    low_cpu_mem_usage=True,
+                )
+            
+            if quantize:
+                model = _quantize_int8(torch, model)
+    
+    if device == "cuda" and os.getenv("BUBU_COMPILE", "0") == "1":
+        _compile_for_decode(torch, model)
     
     _CACHED_MODEL = model
     _CACHED_TOKENIZER = tokenizer
-    _CACHED_MODEL_ID = model_id
+    _CACHED_MODEL_KEY = (model_id, quantization)
     return model, tokenizer
 
 
+def _compile_for_decode(torch, model) -> None:
+    """Compile the forward pass with CUDA graphs and warm it up once.
+    
+    The first compiled call takes tens of seconds, so it happens here at load
+    time rather than inside the first real generation.
+    """
+    start = time.perf_counter()
+    model.forward = torch.compile(model.forward, mode="reduce-overhead", fullgraph=False)
+    with torch.inference_mode():
+        model.generate(
+            input_ids=torch.zeros((1, 8), dtype=torch.long, device=model.device),
+            max_new_tokens=4,
+        )
+    logger.info("Compiled model forward", seconds=round(time.perf_counter() - start, 1))
+
+
+def _hub_kwargs(model_id: str) -> dict:
+    """Return local_files_only=True when the model is already in the HF cache."""
+    try:
+        from huggingface_hub import try_to_load_from_cache
+        if isinstance(try_to_load_from_cache(model_id, "config.json"), str):
+            return {"local_files_only": True}
+    except Exception:
+        pass
+    return {}
+
+
+def _cpu_dtype(torch):
+    """Prefer bf16 weights on CPUs with native bf16 support (AVX512-BF16/AMX)."""
+    cpu = getattr(torch, "cpu", None)
+    for probe in ("_is_amx_tile_supported", "_is_avx512_bf16_supported"):
+        check = getattr(cpu, probe, None)
+        try:
+            if check is not None and check():
+                return torch.bfloat16
+        except Exception:
+            continue
+    return torch.float32
+
+
+def _bnb_config(torch, quantization: str):
+    """Build a bitsandbytes config for "int8" or "nf4" weight quantization."""
+    from transformers import BitsAndBytesConfig
+    if quantization == "int8":
+        return BitsAndBytesConfig(load_in_8bit=True)
+    if quantization == "nf4":
+        return BitsAndBytesConfig(
+            load_in_4bit=True,
+            bnb_4bit_compute_dtype=torch.float16,
+            bnb_4bit_quant_type="nf4"
+        )
+    raise ValueError(f"Unsupported quantization: {quantization}")
+
+
+def _torchao_quantize(torch, model, quantization: str) -> None:
+    """Quantize the model's Linear weights in place with torchao.
+    
+    float8 needs Ada/Hopper (sm89+) tensor cores; elsewhere int8 is used.
+    """
+    from torchao.quantization import quantize_
+    
+    if quantization == "float8_weight_only" and not (
+        torch.cuda.is_available() and torch.cuda.get_device_capability() >= (8, 9)
+    ):
+        logger.warning("float8 weights need an sm89+ GPU, using int8 instead")
+        quantization = "int8_weight_only"
+    
+    try:
+        from torchao.quantization import Float8WeightOnlyConfig, Int8WeightOnlyConfig
+        config = Float8WeightOnlyConfig() if quantization == "float8_weight_only" else Int8WeightOnlyConfig()
+    except ImportError:
+        # torchao < 0.10 exposes factory functions instead of config classes
+        from torchao.quantization import float8_weight_only, int8_weight_only
+        config = float8_weight_only() if quantization == "float8_weight_only" else int8_weight_only()
+    
+    start = time.perf_counter()
+    quantize_(model, config)
+    logger.info(
+        "Quantized model weights with torchao",
+        quantization=quantization,
+        seconds=round(time.perf_counter() - start, 2),
+    )
+
+
+def _quantize_int8(torch, model):
+    """Apply weight-only dynamic INT8 quantization to the model's Linear layers."""
+    fp32_mb = round(model.get_memory_footprint() / 2**20)
+    start = time.perf_counter()
+    model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    logger.info(
+        "Quantized model to INT8",
+        seconds=round(time.perf_counter() - start, 2),
+        fp32_mb=fp32_mb,
+    )
+    return model
+
+
 def _has_flash_attention() -> bool:
     """Check if flash attention is available."""
     try:
@@ -153,8 +364,18 @@ def _has_flash_attention() -> bool:
 class LocalTransformersLLM(LLMProtocol):
     """Local LLM using transformers generate API."""
 
-    def __init__(self, model_id: str):
+    def __init__(self, model_id: str, quantization: Optional[str] = None):
+        """Create the provider.
+        
+        Args:
+            model_id: Hugging Face model id
+            quantization: Optional weight quantization: "int8" or "nf4" with
+                bitsandbytes, or "int8_weight_only" / "float8_weight_only" with torchao
+        """
         self.model_id = model_id
+        self.quantization = quantization
+        # Lowercased once; generate_text dispatches on it several times per call
+        self._model_key = model_id.lower()
         # Lazy-load on first call to avoid blocking startup
 
     async def generate_text(
@@ -165,86 +386,173 @@ class LocalTransformersLLM(LLMProtocol):
         temperature: float,
         top_p: float,
         do_sample: bool,
+        message_type: Optional[MessageType] = None,
     ) -> Optional[str]:
         try:
-            model, tokenizer = await asyncio.to_thread(_ensure_model_loaded, self.model_id)
+            model, tokenizer = await asyncio.to_thread(_ensure_model_loaded, self.model_id, self.quantization)
 
-            messages = []
-            
-            # Format messages based on model type
-            if "phi" in self.model_id.lower():
-                # Phi models work better with a specific format
-                if system_prompt:
-                    # Combine system and user prompts for Phi-2
-                    combined_prompt = f"Instruct: {system_prompt}\n\nInput: {user_prompt}\n\nOutput:"
-                    messages = [{"role": "user", "content": combined_prompt}]
-                else:
-                    messages.append({"role": "user", "content": user_prompt})
-            else:
-                # For all other models (Mistral, DialoGPT, etc.)
-                if system_prompt:
-                    messages.append({"role": "system", "content": system_prompt})
-                messages.append({"role": "user", "content": user_prompt})
+            messages = self._build_messages(system_prompt, user_prompt)
 
             def _generate_sync() -> str:
+                import torch
+
                 # Check if model supports chat templates
                 if hasattr(tokenizer, 'chat_template') and tokenizer.chat_template:
-                    # Use the harmony response format for GPT-OSS models
-                    text = tokenizer.apply_chat_template(
+                    # Use the harmony response format for GPT-OSS models;
+                    # render and tokenize in one pass
+                    inputs = tokenizer.apply_chat_template(
                         messages,
-                        tokenize=False,
                         add_generation_prompt=True,
-                    )
+                        tokenize=True,
+                        return_tensors="pt",
+                        return_dict=True,
+                    ).to(model.device)
                 else:
                     # For models without chat templates (like BLOOM), concatenate directly
                     if system_prompt:
                         text = f"{system_prompt}\n\n{user_prompt}"
                     else:
                         text = user_prompt
+                    inputs = tokenizer([text], return_tensors="pt").to(model.device)
                 
-                inputs = tokenizer([text], return_tensors="pt").to(model.device)
-                
-                # Optimized generation parameters
-                generation_kwargs = {
-                    "max_new_tokens": max_new_tokens,
-                    "do_sample": do_sample,
-                    "top_p": top_p,
-                    "temperature": temperature,
-                    "pad_token_id": tokenizer.eos_token_id if tokenizer.eos_token_id else tokenizer.pad_token_id,
-                    "repetition_penalty": 1.1,  # Avoid repetitive text
-                }
-                
-                # Model-specific adjustments
-                if "dialogpt" in self.model_id.lower():
-                    # DialoGPT benefits from slightly different parameters
-                    generation_kwargs["repetition_penalty"] = 1.2
-                    generation_kwargs["top_k"] = 50
+                generation_kwargs = self._generation_kwargs(
+                    tokenizer, max_new_tokens, temperature, top_p, do_sample
+                )
                 
-                generated = model.generate(**inputs, **generation_kwargs)
-                output_ids = generated[0][len(inputs.input_ids[0]):]
+                # inference_mode skips autograd view/version tracking entirely
+                with torch.inference_mode():
+                    generated = model.generate(**inputs, **generation_kwargs)
+                # Decode only the new tokens: decoder-only outputs echo the
+                # prompt, seq2seq outputs don't
+                input_len = 0 if model.config.is_encoder_decoder else inputs.input_ids.shape[-1]
+                output_ids = generated[0, input_len:]
                 return tokenizer.decode(output_ids, skip_special_tokens=True)
 
             output_text: str = await asyncio.to_thread(_generate_sync)
-            
-            # Clean up the output based on model type
-            if "mistral" in self.model_id.lower() or "mixtral" in self.model_id.lower():
-                # Clean Mistral output
-                output_text = self._clean_instruct_output(output_text)
-            elif "phi" in self.model_id.lower():
-                # Clean Phi output
-                output_text = self._clean_instruct_output(output_text)
-            elif "dialogpt" in self.model_id.lower():
-                # Clean DialoGPT output for better romantic messages
-                output_text = self._clean_dialogpt_output(output_text)
-            elif "bloom" in self.model_id.lower():
-                # Clean and truncate BLOOM output
-                output_text = self._clean_bloom_output(output_text)
-            
-            return output_text.strip()
+            return self._clean_output(output_text)
         except Exception as e:
             logger.error("Local LLM generation failed", error=str(e), model=self.model_id)
             return None
     
+    async def generate_batch(
+        self,
+        prompts: List[Tuple[str, str]],
+        max_new_tokens: int,
+        temperature: float,
+        top_p: float,
+        do_sample: bool,
+    ) -> List[Optional[str]]:
+        """Generate one completion per (system_prompt, user_prompt) pair.
+        
+        All prompts are left-padded into a single batch and run through one
+        ``model.generate`` call, so the weights are streamed once for the
+        whole batch instead of once per prompt.
+        
+        Returns:
+            Cleaned outputs in prompt order; all None if generation failed
+        """
+        try:
+            model, tokenizer = await asyncio.to_thread(_ensure_model_loaded, self.model_id, self.quantization)
+            
+            def _generate_batch_sync() -> List[str]:
+                import torch
+                
+                # Decoder-only models must be padded on the left so every
+                # prompt ends right where its generated tokens begin
+                tokenizer.padding_side = "left"
+                if tokenizer.pad_token is None:
+                    tokenizer.pad_token = tokenizer.eos_token
+                
+                if hasattr(tokenizer, 'chat_template') and tokenizer.chat_template:
+                    inputs = tokenizer.apply_chat_template(
+                        [self._build_messages(system_prompt, user_prompt) for system_prompt, user_prompt in prompts],
+                        add_generation_prompt=True,
+                        tokenize=True,
+                        padding=True,
+                        return_tensors="pt",
+                        return_dict=True,
+                    ).to(model.device)
+                else:
+                    texts = [
+                        f"{system_prompt}\n\n{user_prompt}" if system_prompt else user_prompt
+                        for system_prompt, user_prompt in prompts
+                    ]
+                    inputs = tokenizer(texts, padding=True, return_tensors="pt").to(model.device)
+                
+                generation_kwargs = self._generation_kwargs(
+                    tokenizer, max_new_tokens, temperature, top_p, do_sample
+                )
+                with torch.inference_mode():
+                    generated = model.generate(**inputs, **generation_kwargs, use_cache=True)
+                # With left padding every row's prompt spans the full padded width
+                input_len = 0 if model.config.is_encoder_decoder else inputs.input_ids.shape[-1]
+                return tokenizer.batch_decode(generated[:, input_len:], skip_special_tokens=True)
+            
+            output_texts = await asyncio.to_thread(_generate_batch_sync)
+            return [self._clean_output(text) for text in output_texts]
+        except Exception as e:
+            logger.error("Local LLM batch generation failed", error=str(e), model=self.model_id, batch_size=len(prompts))
+            return [None] * len(prompts)
+    
+    def _build_messages(self, system_prompt: str, user_prompt: str) -> List[dict]:
+        """Format chat messages for the model type."""
+        if "phi" in self._model_key:
+            # Phi models work better with a specific format
+            if system_prompt:
+                # Combine system and user prompts for Phi-2
+                combined_prompt = f"Instruct: {system_prompt}\n\nInput: {user_prompt}\n\nOutput:"
+                return [{"role": "user", "content": combined_prompt}]
+            return [{"role": "user", "content": user_prompt}]
+        
+        # For all other models (Mistral, DialoGPT, etc.)
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": user_prompt})
+        return messages
+    
+    def _generation_kwargs(
+        self,
+        tokenizer,
+        max_new_tokens: int,
+        temperature: float,
+        top_p: float,
+        do_sample: bool,
+    ) -> dict:
+        """Generation parameters with model-specific adjustments."""
+        generation_kwargs = {
+            "max_new_tokens": max_new_tokens,
+            "do_sample": do_sample,
+            "top_p": top_p,
+            "temperature": temperature,
+            "pad_token_id": tokenizer.eos_token_id if tokenizer.eos_token_id else tokenizer.pad_token_id,
+            "repetition_penalty": 1.1,  # Avoid repetitive text
+        }
+        
+        if "dialogpt" in self._model_key:
+            # DialoGPT benefits from slightly different parameters
+            generation_kwargs["repetition_penalty"] = 1.2
+            generation_kwargs["top_k"] = 50
+        
+        return generation_kwargs
+    
+    def _clean_output(self, output_text: str) -> str:
+        """Clean up the decoded output based on model type."""
+        if "mistral" in self._model_key or "mixtral" in self._model_key:
+            # Clean Mistral output
+            output_text = self._clean_instruct_output(output_text)
+        elif "phi" in self._model_key:
+            # Clean Phi output
+            output_text = self._clean_instruct_output(output_text)
+        elif "dialogpt" in self._model_key:
+            # Clean DialoGPT output for better romantic messages
+            output_text = self._clean_dialogpt_output(output_text)
+        elif "bloom" in self._model_key:
+            # Clean and truncate BLOOM output
+            output_text = self._clean_bloom_output(output_text)
+        
+        return output_text.strip()
+    
     def _clean_instruct_output(self, text: str) -> str:
         """Clean instruction-tuned model output."""
         # Remove any instruction artifacts
@@ -253,7 +561,7 @@ class LocalTransformersLLM(LLMProtocol):
         
         for line in lines:
             # Skip lines that look like instructions or system messages
-            if any(marker in line.lower() for marker in ['<|', '|>', '[INST]', '[/INST]', '<<SYS>>', '<</SYS>>']):
+            if _INSTRUCT_MARKER_RE.search(line):
                 continue
             cleaned_lines.append(line)
         
@@ -261,8 +569,6 @@ class LocalTransformersLLM(LLMProtocol):
     
     def _clean_dialogpt_output(self, text: str) -> str:
         """Clean DialoGPT output for romantic messages."""
-        import re
-        
         # Remove any response artifacts
         text = re.sub(r'<\|endoftext\|>', '', text)
         text = re.sub(r'\s+', ' ', text).strip()
@@ -284,8 +590,6 @@ class LocalTransformersLLM(LLMProtocol):
     
     def _clean_bloom_output(self, text: str, max_chars: int = 300) -> str:
         """Clean BLOOM output for meaningful multi-line romantic messages."""
-        import re
-        
         # Remove any quotes at the beginning
         text = text.lstrip('"\'')
         
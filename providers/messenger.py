@@ -40,3 +40,12 @@ class Messenger(ABC):
             Provider name (e.g., 'twilio', 'meta')
         """
         pass
+    
+    async def close(self) -> None:
+        """Release the provider's resources (HTTP connections)."""
+    
+    async def __aenter__(self) -> "Messenger":
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
@@ -3,8 +3,10 @@
 from typing import Optional
 
 import httpx
+
 from utils import get_logger, mask_phone_number
 
+from .http import create_http_client
 from .messenger import Messenger
 
 logger = get_logger(__name__)
@@ -17,13 +19,15 @@ class MetaWhatsApp(Messenger):
         self,
         access_token: str,
         phone_number_id: str,
-        base_url: str = "https://graph.facebook.com/v18.0"
+        base_url: str = "https://graph.facebook.com/v18.0",
+        transport: Optional[httpx.AsyncBaseTransport] = None
     ):
         self.access_token = access_token
         self.phone_number_id = phone_number_id
         self.base_url = base_url
-        self.client = httpx.AsyncClient(
-            timeout=30.0
+        self._client = create_http_client(
+            timeout=30.0,
+            transport=transport
         )
     
     async def send_text(self, to: str, body: str) -> Optional[str]:
@@ -54,7 +58,7 @@ class MetaWhatsApp(Messenger):
                 body_length=len(body)
             )
             
-            response = await self.client.post(
+            response = await self._client.post(
                 f"{self.base_url}/{self.phone_number_id}/messages",
                 json=payload,
                 params={"access_token": self.access_token}
@@ -91,7 +95,7 @@ class MetaWhatsApp(Messenger):
     async def is_available(self) -> bool:
         """Check if Meta WhatsApp service is available."""
         try:
-            response = await self.client.get(
+            response = await self._client.get(
                 f"{self.base_url}/{self.phone_number_id}",
                 params={"access_token": self.access_token}
             )
@@ -109,7 +113,7 @@ class MetaWhatsApp(Messenger):
     
     async def close(self):
         """Close the HTTP client."""
-        await self.client.aclose()
+        await self._client.aclose()
     
     def __repr__(self):
         return f"MetaWhatsApp(phone_number_id={self.phone_number_id})"
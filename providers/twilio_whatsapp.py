@@ -3,8 +3,10 @@
 from typing import Optional
 
 import httpx
+
 from utils import get_logger, mask_phone_number, scrub_secrets_from_logs
 
+from .http import create_http_client
 from .messenger import Messenger
 
 logger = get_logger(__name__)
@@ -18,15 +20,17 @@ class TwilioWhatsApp(Messenger):
         account_sid: str,
         auth_token: str,
         from_number: str,
-        base_url: str = "https://api.twilio.com"
+        base_url: str = "https://api.twilio.com",
+        transport: Optional[httpx.AsyncBaseTransport] = None
     ):
         self.account_sid = account_sid
         self.auth_token = auth_token
         self.from_number = from_number
         self.base_url = base_url
-        self.client = httpx.AsyncClient(
+        self._client = create_http_client(
             auth=(account_sid, auth_token),
-            timeout=30.0
+            timeout=30.0,
+            transport=transport
         )
     
     async def send_text(self, to: str, body: str) -> Optional[str]:
@@ -58,7 +62,7 @@ class TwilioWhatsApp(Messenger):
                 body_length=len(body)
             )
             
-            response = await self.client.post(
+            response = await self._client.post(
                 f"{self.base_url}/2010-04-01/Accounts/{self.account_sid}/Messages.json",
                 data=payload
             )
@@ -95,7 +99,7 @@ class TwilioWhatsApp(Messenger):
     async def is_available(self) -> bool:
         """Check if Twilio service is available."""
         try:
-            response = await self.client.get(
+            response = await self._client.get(
                 f"{self.base_url}/2010-04-01/Accounts/{self.account_sid}.json"
             )
             return response.status_code == 200
@@ -112,7 +116,7 @@ class TwilioWhatsApp(Messenger):
     
     async def close(self):
         """Close the HTTP client."""
-        await self.client.aclose()
+        await self._client.aclose()
     
     def __repr__(self):
         return f"TwilioWhatsApp(from={mask_phone_number(self.from_number)})"
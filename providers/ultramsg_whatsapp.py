@@ -1,7 +1,10 @@
 """Ultramsg WhatsApp provider for Bubu Agent."""
 
-import httpx
 from typing import Optional
+
+import httpx
+
+from .http import create_http_client
 from .messenger import Messenger
 from utils import get_logger
 
@@ -11,18 +14,25 @@ logger = get_logger(__name__)
 class UltramsgWhatsApp(Messenger):
     """Ultramsg WhatsApp implementation."""
     
-    def __init__(self, api_key: str, instance_id: str):
+    def __init__(
+        self,
+        api_key: str,
+        instance_id: str,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
         """
         Initialize Ultramsg WhatsApp provider.
         
         Args:
             api_key: Your Ultramsg API key
             instance_id: Your Ultramsg instance ID
+            transport: Optional httpx transport, e.g. a MockTransport in tests
         """
         self.api_key = api_key
         self.instance_id = instance_id
         self.base_url = "https://api.ultramsg.com"
-        
+        self._client = create_http_client(timeout=30.0, transport=transport)
+    
     async def send_text(self, to: str, body: str) -> Optional[str]:
         """Send a text message via Ultramsg."""
         try:
@@ -47,29 +57,28 @@ class UltramsgWhatsApp(Messenger):
                 body_length=len(body)
             )
             
-            async with httpx.AsyncClient() as client:
-                response = await client.post(url, json=payload, timeout=30.0)
+            response = await self._client.post(url, json=payload)
+            
+            if response.status_code == 200:
+                data = response.json()
+                message_id = data.get('id')
                 
-                if response.status_code == 200:
-                    data = response.json()
-                    message_id = data.get('id')
-                    
-                    logger.info(
-                        "WhatsApp message sent successfully via Ultramsg",
-                        to=to,
-                        message_id=message_id
-                    )
-                    
-                    return message_id
-                else:
-                    logger.error(
-                        "Failed to send WhatsApp message via Ultramsg",
-                        status_code=response.status_code,
-                        response_text=response.text,
-                        to=to
-                    )
-                    return None
-                    
+                logger.info(
+                    "WhatsApp message sent successfully via Ultramsg",
+                    to=to,
+                    message_id=message_id
+                )
+                
+                return message_id
+            else:
+                logger.error(
+                    "Failed to send WhatsApp message via Ultramsg",
+                    status_code=response.status_code,
+                    response_text=response.text,
+                    to=to
+                )
+                return None
+            
         except Exception as e:
             logger.error(
                 "Error sending WhatsApp message via Ultramsg",
@@ -87,20 +96,19 @@ class UltramsgWhatsApp(Messenger):
                 "token": self.api_key
             }
             
-            async with httpx.AsyncClient() as client:
-                response = await client.post(url, json=payload, timeout=10.0)
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    state = data.get('state')
-                    return state == 'open'
-                else:
-                    logger.warning(
-                        "Could not check Ultramsg connection state",
-                        status_code=response.status_code
-                    )
-                    return False
-                    
+            response = await self._client.post(url, json=payload, timeout=10.0)
+            
+            if response.status_code == 200:
+                data = response.json()
+                state = data.get('state')
+                return state == 'open'
+            else:
+                logger.warning(
+                    "Could not check Ultramsg connection state",
+                    status_code=response.status_code
+                )
+                return False
+            
         except Exception as e:
             logger.error(
                 "Error checking Ultramsg availability",
@@ -111,3 +119,7 @@ class UltramsgWhatsApp(Messenger):
     def get_provider_name(self) -> str:
         """Get the provider name."""
         return "ultramsg"
+    
+    async def close(self):
+        """Close the HTTP client."""
+        await self._client.aclose()
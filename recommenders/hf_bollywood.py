@@ -1,10 +1,12 @@
 """Bollywood song recommendation using Hugging Face models."""
 
 import json
+import re
+from functools import lru_cache
 import numpy as np
 import pandas as pd
 from pathlib import Path
-from typing import Dict, List, Optional, Set, Any
+from typing import Dict, List, Optional, Set, Any, Union
 import logging
 
 # Global availability flags
@@ -12,6 +14,7 @@ SENTENCE_TRANSFORMERS_AVAILABLE = False
 FAISS_AVAILABLE = False
 
 try:
+    import torch
     from sentence_transformers import SentenceTransformer, CrossEncoder
     SENTENCE_TRANSFORMERS_AVAILABLE = True
 except ImportError:
@@ -23,6 +26,35 @@ try:
 except ImportError:
     logging.warning("faiss not available. Will use numpy-based search instead.")
 
+# Rows of the embedding matrix upcast to float32 per block during numpy search
+SEARCH_BLOCK_ROWS = 4096
+
+# HNSW breadth at query time; higher trades latency for recall
+HNSW_EF_SEARCH = 64
+
+# IVF clusters probed per query
+IVF_NPROBE = 8
+
+# Song texts (title, artist, moods, themes) fit well within this many tokens
+MAX_SEQ_LENGTH = 64
+
+
+@lru_cache(maxsize=None)
+def load_models(embed_model: str, cross_model: str) -> tuple:
+    """Load the bi-encoder and cross-encoder once per process.
+    
+    Args:
+        embed_model: Hugging Face model for embeddings
+        cross_model: Hugging Face model for cross-encoder reranking
+        
+    Returns:
+        Tuple of (SentenceTransformer, CrossEncoder)
+    """
+    st = SentenceTransformer(embed_model)
+    st.max_seq_length = MAX_SEQ_LENGTH
+    ce = CrossEncoder(cross_model)
+    return st, ce
+
 
 class BollywoodSongRecommender:
     """Recommends Bollywood songs using Hugging Face models and vector search."""
@@ -39,21 +71,21 @@ class BollywoodSongRecommender:
         
         Args:
             catalog_df: DataFrame with song catalog
-            emb_matrix: Pre-computed embeddings matrix
+            emb_matrix: Pre-computed embeddings matrix (float16 is kept as-is)
             faiss_index: Optional FAISS index for faster search
             embed_model: Hugging Face model for embeddings
             cross_model: Hugging Face model for cross-encoder reranking
         """
         self.df = catalog_df.reset_index(drop=True)
-        self.emb = emb_matrix.astype("float32") if emb_matrix is not None else None
+        self.emb = _as_search_matrix(emb_matrix) if emb_matrix is not None else None
         self.faiss = faiss_index
+        self.rerank_texts = _build_rerank_texts(self.df)
         self.st = None
         self.ce = None
         
         if SENTENCE_TRANSFORMERS_AVAILABLE:
             try:
-                self.st = SentenceTransformer(embed_model)
-                self.ce = CrossEncoder(cross_model)
+                self.st, self.ce = load_models(embed_model, cross_model)
                 logging.info(f"Initialized models: {embed_model}, {cross_model}")
             except Exception as e:
                 logging.error(f"Failed to load models: {e}")
@@ -65,79 +97,117 @@ class BollywoodSongRecommender:
     
     def _encode(self, text: str) -> Optional[np.ndarray]:
         """Encode text to vector using sentence transformer."""
+        vectors = self._encode_batch([text])
+        return vectors[0] if vectors is not None else None
+    
+    def _encode_batch(self, texts: List[str]) -> Optional[np.ndarray]:
+        """Encode several texts to a (len(texts), dim) matrix in one pass."""
         if self.st is None:
             return None
         
         try:
-            v = self.st.encode([text], normalize_embeddings=True)
-            return v[0].astype("float32")
+            # Tokenize once and run the forward pass directly, skipping the
+            # batching/sorting machinery of encode() for a few short queries
+            features = self.st.tokenize(texts)
+            features = {k: v.to(self.st.device) for k, v in features.items()}
+            with torch.inference_mode():
+                v = self.st(features)["sentence_embedding"]
+                v = torch.nn.functional.normalize(v, p=2, dim=1)
+            return v.cpu().numpy().astype("float32")
         except Exception as e:
             logging.error(f"Encoding failed: {e}")
             return None
     
     def search_candidates(self, qv: np.ndarray, top_k: int = 30) -> List[Dict]:
         """Search for candidate songs using vector similarity."""
+        return self.search_candidates_batch(qv.reshape(1, -1), top_k)[0]
+    
+    def search_candidates_batch(self, qvs: np.ndarray, top_k: int = 30) -> List[List[Dict]]:
+        """Search candidate songs for several query vectors in one search call."""
         if self.emb is None:
             logging.warning("No embeddings available for search")
-            return []
+            return [[] for _ in range(len(qvs))]
         
         try:
             if self.faiss is not None and FAISS_AVAILABLE:
-                D, I = self.faiss.search(qv.reshape(1, -1), top_k)
-                idxs = I[0].tolist()
+                D, I = self.faiss.search(qvs, top_k)
+                idx_rows = I.tolist()
             else:
                 # Fallback to numpy-based search
-                sims = self.emb @ qv
-                idxs = np.argsort(-sims)[:top_k].tolist()
+                sims = self._similarities(qvs)
+                idx_rows = np.argsort(-sims, axis=0)[:top_k].T.tolist()
             
-            return [self.df.iloc[i].to_dict() for i in idxs]
+            # FAISS pads with -1 when fewer than top_k results exist
+            return [[self.df.iloc[i].to_dict() for i in idxs if i >= 0] for idxs in idx_rows]
         except Exception as e:
             logging.error(f"Search failed: {e}")
-            return []
+            return [[] for _ in range(len(qvs))]
+    
+    def _similarities(self, qvs: np.ndarray) -> np.ndarray:
+        """Dot the queries against the embeddings, upcasting float16 in blocks.
+        
+        Embeddings may be stored (and memory-mapped) as float16; each block is
+        cast to float32 only for the product so the full matrix is never
+        materialized in float32. Returns one column per query.
+        """
+        qvs = qvs.astype(np.float32, copy=False).T
+        if self.emb.dtype == np.float32:
+            return self.emb @ qvs
+        
+        sims = np.empty((len(self.emb),) + qvs.shape[1:], dtype=np.float32)
+        for start in range(0, len(self.emb), SEARCH_BLOCK_ROWS):
+            block = self.emb[start:start + SEARCH_BLOCK_ROWS]
+            sims[start:start + len(block)] = block.astype(np.float32) @ qvs
+        return sims
     
     def filter_candidates(
         self,
-        candidates: List[Dict],
+        candidates: Union[List[Dict], pd.DataFrame],
         preferences: Dict[str, Any]
     ) -> List[Dict]:
-        """Filter candidates based on preferences and constraints."""
-        def is_acceptable(candidate: Dict) -> bool:
-            # Check explicit content
-            if candidate.get("is_explicit", False):
-                return False
-            
-            # Check blacklist terms
-            title_lower = candidate.get("title", "").lower()
-            blacklist = preferences.get("blacklist", [])
-            if any(bad.lower() in title_lower for bad in blacklist):
-                return False
-            
-            # Check duration (2-7 minutes)
-            duration = candidate.get("duration_sec", 0)
-            if not (120 <= duration <= 420):
-                return False
-            
-            # Check URL availability
-            if not candidate.get("url"):
-                return False
-            
-            return True
+        """Filter candidates based on preferences and constraints.
+        
+        All checks run as vectorized boolean masks over a DataFrame. A list
+        of dicts is framed once and its own dicts are returned, in order.
+        """
+        frame = candidates if isinstance(candidates, pd.DataFrame) else pd.DataFrame(candidates)
+        if frame.empty:
+            return []
+        frame = frame.reset_index(drop=True)
+        
+        def column(name: str, default: Any) -> pd.Series:
+            if name in frame:
+                return frame[name].fillna(default)
+            return pd.Series(default, index=frame.index)
+        
+        # Check explicit content
+        keep = ~column("is_explicit", False).astype(bool)
+        
+        # Check blacklist terms
+        blacklist = [bad.lower() for bad in preferences.get("blacklist", [])]
+        if blacklist:
+            titles = column("title", "").astype(str).str.lower()
+            keep &= ~titles.str.contains("|".join(map(re.escape, blacklist)), regex=True)
         
-        # Filter acceptable candidates
-        filtered = [c for c in candidates if is_acceptable(c)]
+        # Check duration (2-7 minutes)
+        duration = pd.to_numeric(column("duration_sec", 0), errors="coerce")
+        keep &= duration.between(120, 420)
         
-        # Sort by language priority and views
+        # Check URL availability
+        keep &= column("url", "").astype(bool)
+        
+        # Sort by language priority, then views (stable, like list.sort)
         lang_order = {
             lang: i for i, lang in enumerate(preferences.get("language_priority", ["Hindi"]))
         }
+        kept = frame.index[keep.to_numpy()]
+        lang_rank = column("language", "").map(lang_order).fillna(999).to_numpy()[kept]
+        views = pd.to_numeric(column("views", 0), errors="coerce").fillna(0).to_numpy()[kept]
+        order = kept[np.lexsort((-views, lang_rank))]
         
-        def sort_key(candidate: Dict) -> tuple:
-            lang = candidate.get("language", "")
-            views = candidate.get("views", 0) or 0
-            return (lang_order.get(lang, 999), -views)
-        
-        filtered.sort(key=sort_key)
-        return filtered
+        if isinstance(candidates, pd.DataFrame):
+            return frame.iloc[order].to_dict("records")
+        return [candidates[i] for i in order]
     
     def rerank_with_cross_encoder(
         self,
@@ -151,31 +221,68 @@ class BollywoodSongRecommender:
         
         try:
             subset = candidates[:top_k]
-            pairs = [
-                (query_text, f'{c["title"]} {c.get("artist", "")} {c.get("moods", "")}')
-                for c in subset
-            ]
-            scores = self.ce.predict(pairs).tolist()
-            order = np.argsort(-np.array(scores)).tolist()
+            texts = [self.rerank_texts[c["song_id"]] for c in subset]
+            scores = self._cross_encoder_scores(query_text, texts)
+            order = np.argsort(-scores).tolist()
             return [subset[i] for i in order]
         except Exception as e:
             logging.error(f"Cross-encoder reranking failed: {e}")
             return candidates[:top_k]
     
+    def _cross_encoder_scores(self, query_text: str, texts: List[str]) -> np.ndarray:
+        """Score (query, text) pairs, tokenizing the query only once.
+        
+        The query ids are reused for every pair and all candidate texts are
+        tokenized in a single batch call. Both sides are truncated so each
+        pair fits the cross-encoder's max length: the query keeps what the
+        longest candidate leaves free, but never less than half the budget.
+        """
+        tokenizer = self.ce.tokenizer
+        max_length = self.ce.max_length or tokenizer.model_max_length
+        budget = max(max_length - tokenizer.num_special_tokens_to_add(pair=True), 2)
+        
+        q_ids = tokenizer(query_text, add_special_tokens=False)["input_ids"]
+        c_ids = tokenizer(texts, add_special_tokens=False)["input_ids"]
+        
+        longest = max(len(ids) for ids in c_ids)
+        q_ids = q_ids[:max(budget - longest, budget // 2)]
+        room = budget - len(q_ids)
+        
+        features = [
+            tokenizer.prepare_for_model(q_ids, ids[:room], add_special_tokens=True)
+            for ids in c_ids
+        ]
+        batch = tokenizer.pad(features, padding=True, return_tensors="pt")
+        batch = {k: v.to(self.ce.model.device) for k, v in batch.items()}
+        
+        with torch.inference_mode():
+            logits = self.ce.model(**batch).logits
+        
+        # Raw logits rank identically to the activated scores
+        return logits[:, 0].float().cpu().numpy()
+    
     def pick_one(
         self,
         candidates: List[Dict],
         recent_ids: Set[str]
     ) -> Optional[Dict]:
-        """Pick one song avoiding recent selections."""
-        for candidate in candidates:
-            if candidate["song_id"] not in recent_ids:
-                return {
-                    "song_id": candidate["song_id"],
-                    "title": candidate["title"],
-                    "url": candidate["url"]
-                }
-        return None
+        """Pick one song avoiding recent selections.
+        
+        Falls back to the top candidate when every candidate was picked
+        recently, so small catalogs still yield a song.
+        """
+        if not candidates:
+            return None
+        
+        candidate = next(
+            (c for c in candidates if c["song_id"] not in recent_ids),
+            candidates[0]
+        )
+        return {
+            "song_id": candidate["song_id"],
+            "title": candidate["title"],
+            "url": candidate["url"]
+        }
     
     def recommend_song(
         self,
@@ -197,6 +304,50 @@ class BollywoodSongRecommender:
         
         # Search candidates
         candidates = self.search_candidates(query_vector, top_k)
+        return self._select_song(query_text, candidates, preferences, frozenset(recent_ids))
+    
+    def recommend_songs_batch(
+        self,
+        query_texts: List[str],
+        preferences: Dict[str, Any],
+        recent_ids: Set[str],
+        top_k: int = 30
+    ) -> List[Optional[Dict]]:
+        """Recommend one song per query with a single encode and search pass.
+        
+        Songs picked for earlier queries count as recent for later ones, so a
+        batch does not repeat a song.
+        """
+        if not SENTENCE_TRANSFORMERS_AVAILABLE or self.st is None:
+            logging.warning("Models not available for song recommendation")
+            return [None] * len(query_texts)
+        
+        # Encode all queries together
+        query_vectors = self._encode_batch(query_texts)
+        if query_vectors is None:
+            logging.error("Failed to encode queries")
+            return [None] * len(query_texts)
+        
+        # Search candidates for all queries at once
+        candidate_lists = self.search_candidates_batch(query_vectors, top_k)
+        
+        excluded = set(recent_ids)
+        picks = []
+        for query_text, candidates in zip(query_texts, candidate_lists):
+            song = self._select_song(query_text, candidates, preferences, frozenset(excluded))
+            if song:
+                excluded.add(song["song_id"])
+            picks.append(song)
+        return picks
+    
+    def _select_song(
+        self,
+        query_text: str,
+        candidates: List[Dict],
+        preferences: Dict[str, Any],
+        recent_ids: frozenset
+    ) -> Optional[Dict]:
+        """Filter, rerank and pick one song from searched candidates."""
         if not candidates:
             logging.error("No candidates found")
             return None
@@ -233,11 +384,44 @@ def load_song_catalog(catalog_path: str) -> pd.DataFrame:
         return pd.DataFrame()
 
 
+def _build_rerank_texts(df: pd.DataFrame) -> Dict[str, str]:
+    """Map song_id to the "title artist moods" text scored by the cross-encoder."""
+    if df.empty or "song_id" not in df:
+        return {}
+    
+    # Missing columns and non-string values must not break the constructor
+    def column(name: str) -> pd.Series:
+        if name not in df:
+            return pd.Series("", index=df.index)
+        return df[name].fillna("").astype(str)
+    
+    texts = column("title") + " " + column("artist") + " " + column("moods")
+    return dict(zip(df["song_id"], texts))
+
+
+def _as_search_matrix(emb: np.ndarray) -> np.ndarray:
+    """Keep float16/float32 embeddings as-is, casting anything else to float32."""
+    if emb.dtype in (np.float16, np.float32):
+        return emb
+    return emb.astype(np.float32)
+
+
+def save_embeddings_fp16(embeddings_path: str, emb: np.ndarray) -> None:
+    """Save L2-normalized embeddings as float16, halving their size on disk and in memory.
+    
+    Rows are normalized in float32 before the cast so inner products at query
+    time are cosine similarities without any per-query renormalization.
+    """
+    emb = np.asarray(emb, dtype=np.float32)
+    norms = np.linalg.norm(emb, axis=1, keepdims=True)
+    np.save(embeddings_path, (emb / np.maximum(norms, 1e-12)).astype(np.float16))
+
+
 def load_embeddings(embeddings_path: str) -> Optional[np.ndarray]:
-    """Load pre-computed embeddings."""
+    """Load pre-computed embeddings, memory-mapped and in their stored dtype."""
     try:
-        emb = np.load(embeddings_path)
-        logging.info(f"Loaded embeddings with shape {emb.shape}")
+        emb = np.load(embeddings_path, mmap_mode="r")
+        logging.info(f"Loaded embeddings with shape {emb.shape} ({emb.dtype})")
         return emb
     except Exception as e:
         logging.error(f"Failed to load embeddings: {e}")
@@ -251,6 +435,11 @@ def load_faiss_index(index_path: str) -> Optional[Any]:
     
     try:
         index = faiss.read_index(index_path)
+        # Search-time parameters are not persisted with the index
+        if hasattr(index, "hnsw"):
+            index.hnsw.efSearch = HNSW_EF_SEARCH
+        if hasattr(index, "nprobe"):
+            index.nprobe = IVF_NPROBE
         logging.info(f"Loaded FAISS index from {index_path}")
         return index
     except Exception as e:
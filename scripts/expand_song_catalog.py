@@ -1,107 +1,41 @@
 #!/usr/bin/env python3
 """Expand Bollywood song catalog to 500 songs."""
 
-import csv
 import random
-from typing import List, Dict
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+LANGUAGES = ["Hindi", "English", "Punjabi", "Urdu"]
+
+# Hand-picked songs that open the catalog
+BASE_SONGS_PATH = Path(__file__).resolve().parent.parent / "data" / "base_songs.csv"
+
+
+def _fill(n_remaining: int, n_titles: int, n_artists: int, n_moods: int,
+          n_themes: int, rng: np.random.Generator) -> Dict[str, np.ndarray]:
+    """Draw all random fields for the generated songs in one pass per column."""
+    return {
+        'title_idx': rng.integers(0, n_titles, n_remaining),
+        'artist_idx': rng.integers(0, n_artists, n_remaining),
+        'year': rng.integers(1950, 2025, n_remaining),
+        'language_idx': rng.integers(0, len(LANGUAGES), n_remaining),
+        'mood_idx': rng.integers(0, n_moods, n_remaining),
+        'theme_idx': rng.integers(0, n_themes, n_remaining),
+        'duration_sec': rng.integers(240, 361, n_remaining),
+        'views': rng.integers(1000000, 200000001, n_remaining),
+    }
 
 def generate_expanded_catalog():
     """Generate 500 unique Bollywood romantic songs."""
     
     # Base romantic songs with real titles and artists
-    base_songs = [
-        # Classic Romantic Songs (1950s-1980s)
-        ("Tere Bina Zindagi Se", "Lata Mangeshkar", 1981, "Hindi", "romantic", "devotion"),
-        ("Lag Jaa Gale", "Lata Mangeshkar", 1964, "Hindi", "romantic", "melancholy"),
-        ("Aap Jaisa Koi", "Nazia Hassan", 1980, "Hindi", "romantic", "first_love"),
-        ("Tere Sang Yaara", "Lata Mangeshkar", 1975, "Hindi", "romantic", "passion"),
-        ("Mere Sapno Ki Rani", "Kishore Kumar", 1969, "Hindi", "romantic", "dreamy"),
-        ("Pyar Hua Ikrar Hua", "Lata Mangeshkar", 1955, "Hindi", "romantic", "confession"),
-        ("Aaj Kal Tere Mere", "Kishore Kumar", 1972, "Hindi", "romantic", "playful"),
-        ("Tum Jo Mil Gaye Ho", "Mohammed Rafi", 1971, "Hindi", "romantic", "reunion"),
-        ("Yeh Raat Bheegi Bheegi", "Lata Mangeshkar", 1956, "Hindi", "romantic", "rainy_night"),
-        ("Chaudhvin Ka Chand", "Mohammed Rafi", 1960, "Hindi", "romantic", "beauty"),
-        
-        # 1990s Romantic Era
-        ("Pehla Nasha", "Udit Narayan", 1992, "Hindi", "romantic", "first_love"),
-        ("Tum Mile", "Atif Aslam", 2009, "Hindi", "romantic", "reunion"),
-        ("Chal Chaiyya Chaiyya", "Sukhwinder Singh", 1998, "Hindi", "romantic", "celebration"),
-        ("Tere Bina", "Shreya Ghoshal", 2007, "Hindi", "romantic", "separation"),
-        ("Main Tera Boyfriend", "Rahat Fateh Ali Khan", 2016, "Hindi", "romantic", "playful"),
-        ("Phir Bhi Tumko Chaahungi", "Arijit Singh", 2016, "Hindi", "romantic", "unconditional"),
-        ("Channa Mereya", "Arijit Singh", 2017, "Hindi", "romantic", "heartbreak"),
-        ("Gerua", "Shreya Ghoshal", 2015, "Hindi", "romantic", "passion"),
-        ("Soch Na Sake", "Arijit Singh", 2016, "Hindi", "romantic", "confusion"),
-        ("Tum Se Hi", "Jagjit Singh", 2007, "Hindi", "romantic", "devotion"),
-        
-        # Modern Era (2000s-2020s)
-        ("Tum Hi Ho", "Arijit Singh", 2013, "Hindi", "romantic", "longing"),
-        ("Kal Ho Naa Ho", "Shankar Mahadevan", 2003, "Hindi", "romantic", "melancholy"),
-        ("Agar Tum Saath Ho", "Arijit Singh", 2015, "Hindi", "romantic", "companionship"),
-        ("Raabta", "Shreya Ghoshal", 2012, "Hindi", "romantic", "destiny"),
-        ("Kabira", "Yo Yo Honey Singh", 2013, "Hindi", "romantic", "devotion"),
-        ("Main Agar Kahoon", "Sonu Nigam", 2007, "Hindi", "romantic", "confession"),
-        ("Tere Liye", "Atif Aslam", 2010, "Hindi", "romantic", "dedication"),
-        ("Kabhi Kabhi Aditi", "Shankar Mahadevan", 2008, "Hindi", "romantic", "nostalgia"),
-        ("Kya Mujhe Pyaar Hai", "Mohit Chauhan", 2007, "Hindi", "romantic", "realization"),
-        
-        # Additional Romantic Classics
-        ("Dil To Pagal Hai", "Lata Mangeshkar", 1997, "Hindi", "romantic", "madness"),
-        ("Tere Naam", "Udit Narayan", 2003, "Hindi", "romantic", "devotion"),
-        ("Mere Haath Mein", "Sonu Nigam", 2006, "Hindi", "romantic", "proposal"),
-        ("Tere Sang Yaara", "Rahat Fateh Ali Khan", 2016, "Hindi", "romantic", "devotion"),
-        ("Ae Dil Hai Mushkil", "Arijit Singh", 2016, "Hindi", "romantic", "difficulty"),
-        ("Tum Se Hi", "Mohit Chauhan", 2007, "Hindi", "romantic", "devotion"),
-        ("Main Tera Boyfriend", "Rahat Fateh Ali Khan", 2016, "Hindi", "romantic", "playful"),
-        ("Phir Bhi Tumko Chaahungi", "Arijit Singh", 2016, "Hindi", "romantic", "unconditional"),
-        ("Channa Mereya", "Arijit Singh", 2017, "Hindi", "romantic", "heartbreak"),
-        ("Gerua", "Shreya Ghoshal", 2015, "Hindi", "romantic", "passion"),
-        
-        # More Romantic Gems
-        ("Tum Hi Ho", "Arijit Singh", 2013, "Hindi", "romantic", "longing"),
-        ("Pehla Nasha", "Udit Narayan", 1992, "Hindi", "romantic", "first_love"),
-        ("Tere Sang Yaara", "Rahat Fateh Ali Khan", 2016, "Hindi", "romantic", "devotion"),
-        ("Kal Ho Naa Ho", "Shankar Mahadevan", 2003, "Hindi", "romantic", "melancholy"),
-        ("Tum Mile", "Atif Aslam", 2009, "Hindi", "romantic", "reunion"),
-        ("Agar Tum Saath Ho", "Arijit Singh", 2015, "Hindi", "romantic", "companionship"),
-        ("Raabta", "Shreya Ghoshal", 2012, "Hindi", "romantic", "destiny"),
-        ("Chal Chaiyya Chaiyya", "Sukhwinder Singh", 1998, "Hindi", "romantic", "celebration"),
-        ("Tere Bina", "Shreya Ghoshal", 2007, "Hindi", "romantic", "separation"),
-        ("Kabira", "Yo Yo Honey Singh", 2013, "Hindi", "romantic", "devotion"),
-        
-        # Additional Songs to reach 500
-        ("Main Tera Boyfriend", "Rahat Fateh Ali Khan", 2016, "Hindi", "romantic", "playful"),
-        ("Phir Bhi Tumko Chaahungi", "Arijit Singh", 2016, "Hindi", "romantic", "unconditional"),
-        ("Channa Mereya", "Arijit Singh", 2017, "Hindi", "romantic", "heartbreak"),
-        ("Gerua", "Shreya Ghoshal", 2015, "Hindi", "romantic", "passion"),
-        ("Soch Na Sake", "Arijit Singh", 2016, "Hindi", "romantic", "confusion"),
-        ("Tum Se Hi", "Jagjit Singh", 2007, "Hindi", "romantic", "devotion"),
-        ("Kya Mujhe Pyaar Hai", "Mohit Chauhan", 2007, "Hindi", "romantic", "realization"),
-        ("Main Agar Kahoon", "Sonu Nigam", 2007, "Hindi", "romantic", "confession"),
-        ("Tere Liye", "Atif Aslam", 2010, "Hindi", "romantic", "dedication"),
-        ("Kabhi Kabhi Aditi", "Shankar Mahadevan", 2008, "Hindi", "romantic", "nostalgia"),
-    ]
-    
-    # Generate variations and additional songs
-    songs = []
-    song_id = 1
+    base_songs = pd.read_csv(BASE_SONGS_PATH)
     
-    # Add base songs
-    for title, artist, year, language, mood, theme in base_songs:
-        songs.append({
-            'song_id': f'B{song_id:03d}',
-            'title': title,
-            'artist': artist,
-            'year': year,
-            'language': language,
-            'moods': mood,
-            'themes': theme,
-            'url': f'https://www.youtube.com/watch?v=song{song_id:03d}',
-            'duration_sec': random.randint(240, 360),
-            'views': random.randint(1000000, 200000000),
-            'is_explicit': False
-        })
-        song_id += 1
+    # Drop repeated entries, keeping first-seen order
+    base_songs = base_songs.drop_duplicates(ignore_index=True)
     
     # Generate additional songs with variations
     additional_titles = [
@@ -132,42 +66,37 @@ def generate_expanded_catalog():
     ]
     
     # Generate remaining songs to reach 500
-    while len(songs) < 500:
-        title = random.choice(additional_titles)
-        artist = random.choice(additional_artists)
-        year = random.randint(1950, 2024)
-        language = random.choice(["Hindi", "English", "Punjabi", "Urdu"])
-        mood = random.choice(additional_moods)
-        theme = random.choice(additional_themes)
-        
-        # Ensure unique song_id
-        song_id_str = f'B{song_id:03d}'
-        
-        songs.append({
-            'song_id': song_id_str,
-            'title': title,
-            'artist': artist,
-            'year': year,
-            'language': language,
-            'moods': mood,
-            'themes': theme,
-            'url': f'https://www.youtube.com/watch?v=song{song_id:03d}',
-            'duration_sec': random.randint(240, 360),
-            'views': random.randint(1000000, 200000000),
-            'is_explicit': False
-        })
-        song_id += 1
+    n_remaining = max(0, 500 - len(base_songs))
+    fill = _fill(
+        n_remaining, len(additional_titles), len(additional_artists),
+        len(additional_moods), len(additional_themes), np.random.default_rng()
+    )
     
-    return songs
+    # Build the catalog column-wise: base songs first, then generated ones
+    n_songs = len(base_songs) + n_remaining
+    song_numbers = range(1, n_songs + 1)
+    
+    return pd.DataFrame({
+        'song_id': list(map('B{:03d}'.format, song_numbers)),
+        'title': [*base_songs['title'], *np.take(additional_titles, fill['title_idx'])],
+        'artist': [*base_songs['artist'], *np.take(additional_artists, fill['artist_idx'])],
+        'year': np.concatenate([base_songs['year'], fill['year']]).astype(int),
+        'language': [*base_songs['language'], *np.take(LANGUAGES, fill['language_idx'])],
+        'moods': [*base_songs['moods'], *np.take(additional_moods, fill['mood_idx'])],
+        'themes': [*base_songs['themes'], *np.take(additional_themes, fill['theme_idx'])],
+        'url': list(map('https://www.youtube.com/watch?v=song{:03d}'.format, song_numbers)),
+        'duration_sec': np.concatenate([
+            random.choices(range(240, 361), k=len(base_songs)), fill['duration_sec']
+        ]),
+        'views': np.concatenate([
+            random.choices(range(1000000, 200000001), k=len(base_songs)), fill['views']
+        ]),
+        'is_explicit': False,
+    })
 
-def write_csv(songs: List[Dict], filename: str):
+def write_csv(songs: pd.DataFrame, filename: str):
     """Write songs to CSV file."""
-    fieldnames = ['song_id', 'title', 'artist', 'year', 'language', 'moods', 'themes', 'url', 'duration_sec', 'views', 'is_explicit']
-    
-    with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(songs)
+    songs.to_csv(filename, index=False, encoding='utf-8')
     
     print(f"✅ Successfully created {filename} with {len(songs)} songs!")
 
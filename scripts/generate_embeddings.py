@@ -3,61 +3,102 @@
 
 import argparse
 import logging
+import sys
 import numpy as np
 import pandas as pd
+import torch
 from pathlib import Path
 from sentence_transformers import SentenceTransformer
 import faiss
 
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from recommenders.hf_bollywood import save_embeddings_fp16
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def build_faiss_index(embeddings: np.ndarray, index_type: str = "hnsw"):
+    """Build an inner-product FAISS index (cosine on normalized vectors)."""
+    vectors = embeddings.astype('float32')
+    dimension = vectors.shape[1]
+    
+    if index_type == "ivfpq":
+        # Coarse clusters plus 8-byte product-quantized codes per vector
+        nlist = 16 if len(vectors) < 1000 else 32
+        quantizer = faiss.IndexFlatIP(dimension)
+        index = faiss.IndexIVFPQ(quantizer, dimension, nlist, 8, 8, faiss.METRIC_INNER_PRODUCT)
+        index.train(vectors)
+        index.nprobe = 8
+    else:
+        # HNSW graph over full-precision vectors
+        index = faiss.IndexHNSWFlat(dimension, 32, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = 200
+    
+    index.add(vectors)
+    return index
+
+
 def generate_embeddings(
     catalog_path: str,
     embeddings_path: str,
     faiss_index_path: str = None,
-    model_name: str = "sentence-transformers/all-MiniLM-L6-v2"
+    model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+    batch_size: int = 128,
+    index_type: str = "hnsw"
 ):
     """Generate embeddings for the song catalog."""
     
     # Load catalog
     logger.info(f"Loading catalog from {catalog_path}")
-    df = pd.read_csv(catalog_path)
+    # Only the text columns feed the embeddings; typing them up front skips inference
+    text_columns = ['title', 'artist', 'moods', 'themes']
+    df = pd.read_csv(
+        catalog_path,
+        usecols=text_columns,
+        dtype=dict.fromkeys(text_columns, 'string')
+    )
     logger.info(f"Loaded {len(df)} songs")
     
     # Initialize model
     logger.info(f"Loading model: {model_name}")
     model = SentenceTransformer(model_name)
+    # Fixed short sequence length keeps batch shapes stable across runs
+    model.max_seq_length = 64
+    torch.set_float32_matmul_precision('high')
+    
+    # Combine title, artist, moods, and themes column-wise
+    texts = df['title'].str.cat(
+        [df['artist'], df['moods'], df['themes']], sep=' ', na_rep=''
+    ).tolist()
     
-    # Create text representations for each song
-    texts = []
-    for _, row in df.iterrows():
-        # Combine title, artist, moods, and themes
-        text_parts = [
-            str(row.get('title', '')),
-            str(row.get('artist', '')),
-            str(row.get('moods', '')),
-            str(row.get('themes', ''))
-        ]
-        text = ' '.join(text_parts)
-        texts.append(text)
+    # Half-precision forward pass on GPU; CPU kernels stay in fp32
+    if model.device.type == "cuda":
+        model.half()
     
     # Generate embeddings
     logger.info("Generating embeddings...")
-    embeddings = model.encode(texts, normalize_embeddings=True)
+    with torch.inference_mode():
+        embeddings = model.encode(
+            texts,
+            batch_size=batch_size,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+            show_progress_bar=True
+        )
     
-    # Save embeddings
+    # Save L2-normalized float16 embeddings; the recommender upcasts blocks
+    # at query time and scores them with plain inner products
     logger.info(f"Saving embeddings to {embeddings_path}")
-    np.save(embeddings_path, embeddings)
+    save_embeddings_fp16(embeddings_path, embeddings)
     
     # Create FAISS index if requested
     if faiss_index_path:
-        logger.info(f"Creating FAISS index...")
-        dimension = embeddings.shape[1]
-        index = faiss.IndexFlatIP(dimension)  # Inner product for cosine similarity
-        index.add(embeddings.astype('float32'))
+        logger.info(f"Creating FAISS index ({index_type})...")
+        index = build_faiss_index(embeddings, index_type)
         
         logger.info(f"Saving FAISS index to {faiss_index_path}")
         faiss.write_index(index, faiss_index_path)
@@ -74,6 +115,8 @@ def main():
     parser.add_argument("--embeddings", default="data/bollywood_songs_embeddings.npy", help="Path to save embeddings")
     parser.add_argument("--faiss-index", default="data/bollywood_songs.index", help="Path to save FAISS index")
     parser.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2", help="Hugging Face model name")
+    parser.add_argument("--batch-size", type=int, default=128, help="Encoding batch size")
+    parser.add_argument("--index-type", choices=["hnsw", "ivfpq"], default="hnsw", help="FAISS index type")
     parser.add_argument("--no-faiss", action="store_true", help="Skip FAISS index creation")
     
     args = parser.parse_args()
@@ -88,7 +131,9 @@ def main():
         catalog_path=args.catalog,
         embeddings_path=args.embeddings,
         faiss_index_path=None if args.no_faiss else args.faiss_index,
-        model_name=args.model
+        model_name=args.model,
+        batch_size=args.batch_size,
+        index_type=args.index_type
     )
 
 
@@ -1,6 +1,7 @@
 """FastAPI application for Bubu Agent."""
 
 import asyncio
+import hmac
 from datetime import date
 from typing import Dict, List, Optional, Any
 
@@ -15,9 +16,8 @@ from utils import (
     get_logger,
     setup_logging
 )
-from utils.compose_refactored import create_message_composer_refactored
-from utils.types import MessageType
-from utils.llm_factory import create_llm
+from utils.compose_refactored import MessageComposer, create_message_composer_refactored
+from utils.types import LLMProtocol, MessageType
 
 # Setup logging
 setup_logging(config.settings.log_level)
@@ -32,12 +32,35 @@ app = FastAPI(
 
 # Security
 security = HTTPBearer()
+_EXPECTED_TOKEN = config.settings.api_bearer_token.encode()
+
+# Message types accepted by the preview and send endpoints
+VALID_MESSAGE_TYPES = frozenset({"morning", "flirty", "night"})
 
 # Create scheduler instance
 scheduler = MessageScheduler()
 
-# Create LLM instance using factory
-llm = create_llm()
+
+def get_llm() -> LLMProtocol:
+    """Return the scheduler's LLM, so the app holds a single instance.
+    
+    scheduler.close() on shutdown closes it along with the messenger.
+    """
+    return scheduler.llm
+
+
+# Composers keyed by the storage they were built with
+_composer_cache: Dict[int, MessageComposer] = {}
+
+
+def _get_composer(storage: Optional[Storage] = None) -> MessageComposer:
+    """Return a shared composer for the given storage, creating it once."""
+    key = id(storage)
+    composer = _composer_cache.get(key)
+    if composer is None:
+        composer = create_message_composer_refactored(get_llm(), storage)
+        _composer_cache[key] = composer
+    return composer
 
 
 class MessagePreviewRequest(BaseModel):
@@ -90,7 +113,8 @@ class DryRunResponse(BaseModel):
 
 def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)) -> bool:
     """Verify the bearer token."""
-    if credentials.credentials != config.settings.api_bearer_token:
+    # Constant-time comparison so response timing does not leak the token
+    if not hmac.compare_digest(credentials.credentials.encode(), _EXPECTED_TOKEN):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid bearer token"
@@ -116,6 +140,7 @@ async def shutdown_event():
     try:
         logger.info("Shutting down Bubu Agent")
         scheduler.stop()
+        await scheduler.close()
         logger.info("Bubu Agent shut down successfully")
     except Exception as e:
         logger.error("Error during shutdown", error=str(e))
@@ -172,13 +197,14 @@ async def preview_message(
 ):
     """Preview messages without sending."""
     try:
-        if request.type not in ["morning", "flirty", "night"]:
+        if request.type not in VALID_MESSAGE_TYPES:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Invalid message type. Must be one of: morning, flirty, night"
             )
         
-        composer = create_message_composer_refactored(llm)
+        composer = _get_composer()
+        message_type = MessageType(request.type)
         options = request.options or {}
         count = options.get("count", 1)
         include_fallback = options.get("include_fallback", False)
@@ -190,8 +216,6 @@ async def preview_message(
         # Generate multiple messages
         for i in range(count):
             try:
-                message_type = MessageType(request.type)
-                
                 if use_ai_generation:
                     # Use AI generation with Bollywood quotes and cheesy lines
                     today = date.today()
@@ -268,17 +292,19 @@ async def dry_run():
     """Get today's planned messages without sending."""
     try:
         today = date.today()
-        composer = create_message_composer_refactored(llm, scheduler.storage)
+        composer = _get_composer(scheduler.storage)
         
-        messages = []
-        for message_type_str in ["morning", "flirty", "night"]:
-            message_type = MessageType(message_type_str)
-            result = await composer.compose_message(message_type, today)
-            messages.append({
-                "type": message_type_str,
+        # One call for the whole day: batched on local models, concurrent otherwise
+        results = await composer.compose_all_messages(today)
+        
+        messages = [
+            {
+                "type": message_type.value,
                 "message": result.text,
                 "status": result.status.value
-            })
+            }
+            for message_type, result in results.items()
+        ]
         
         return DryRunResponse(
             date=today.isoformat(),
@@ -299,7 +325,7 @@ async def send_message_now(
 ):
     """Send a message immediately."""
     try:
-        if request.type not in ["morning", "flirty", "night"]:
+        if request.type not in VALID_MESSAGE_TYPES:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Invalid message type. Must be one of: morning, flirty, night"
@@ -409,6 +435,7 @@ def main():
         host="0.0.0.0",
         port=8000,
         reload=False,
+        loop="auto",  # uvloop when installed, else asyncio
         log_level=config.settings.log_level.lower()
     )
 
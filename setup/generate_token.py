@@ -17,7 +17,14 @@ def generate_secure_token(length=32):
 def generate_readable_token(length=32):
     """Generate a readable token (letters and numbers only)."""
     alphabet = string.ascii_letters + string.digits
-    return ''.join(secrets.choice(alphabet) for _ in range(length))
+    # Largest multiple of the alphabet size that fits in a byte; bytes at or
+    # above it are rejected so every character stays equally likely
+    limit = 256 - 256 % len(alphabet)
+    chars = []
+    while len(chars) < length:
+        raw = secrets.token_bytes(length)
+        chars.extend(alphabet[b % len(alphabet)] for b in raw if b < limit)
+    return ''.join(chars[:length])
 
 def main():
     print("🔐 Bubu Agent - API Token Generator")
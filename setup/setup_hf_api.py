@@ -5,92 +5,200 @@ Setup Hugging Face API Key for Bubu Agent
 This script helps you set up a valid Hugging Face API key and choose a working model.
 """
 
+import asyncio
+import hashlib
+import json
 import os
+import re
 import sys
+import time
 from pathlib import Path
+from typing import Awaitable, Callable, Optional
 
 import httpx
 
-def test_api_key(api_key: str) -> bool:
-    """Test if a Hugging Face API key is valid."""
+ENV_PATH = Path(__file__).parent.parent / ".env"
+PROBE_CACHE_PATH = Path.home() / ".cache" / "bubu_agent" / "hf_probe.json"
+PROBE_CACHE_TTL = 3600  # seconds
+
+# Hugging Face user access tokens: "hf_" followed by an alphanumeric secret
+_HF_KEY_RE = re.compile(r"^hf_[A-Za-z0-9]{30,50}$")
+
+# Recommended models (known to work well), in priority order
+RECOMMENDED_MODELS: tuple[str, ...] = (
+    "openai/gpt-oss-20b",          # Best: Advanced conversational AI
+    "openai/gpt-oss-120b",         # Premium: Larger model if you have resources
+    "microsoft/DialoGPT-medium",   # Fallback: Older but reliable
+    "microsoft/DialoGPT-small",    # Lightweight: For limited resources
+    "gpt2-medium",                 # Basic: Simple text generation
+    "facebook/blenderbot-400M-distill"  # Alternative: Facebook's model
+)
+
+def load_cache() -> dict:
+    """Load cached model probe results, or an empty cache."""
+    try:
+        with open(PROBE_CACHE_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_cache(cache: dict):
+    """Persist model probe results."""
+    try:
+        PROBE_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        with open(PROBE_CACHE_PATH, 'w') as f:
+            json.dump(cache, f)
+    except OSError:
+        pass
+
+def _cache_key(api_key: str, model_id: str) -> str:
+    """Key probe results by a short hash of the API key and the model id."""
+    return hashlib.sha256(api_key.encode()).hexdigest()[:12] + ":" + model_id
+
+def read_line(prompt: str) -> str:
+    """Read one line from stdin in a single read, so pasted tokens arrive at once."""
+    sys.stdout.write(prompt)
+    sys.stdout.flush()
+    line = sys.stdin.readline()
+    if not line:
+        raise EOFError
+    return line.rstrip("\n")
+
+def make_client() -> httpx.AsyncClient:
+    """Create the pooled client shared by every Hugging Face request."""
+    return httpx.AsyncClient(timeout=httpx.Timeout(connect=3.0, read=8.0, write=3.0, pool=3.0))
+
+async def test_api_key(client: httpx.AsyncClient) -> bool:
+    """Test if the API key set on the client is valid."""
     try:
-        response = httpx.get(
-            "https://huggingface.co/api/whoami",
-            headers={"Authorization": f"Bearer {api_key}"},
-            timeout=10
-        )
+        response = await client.get("https://huggingface.co/api/whoami", timeout=10)
         return response.status_code == 200
     except:
         return False
 
-def test_model(api_key: str, model_id: str) -> bool:
-    """Test if a model is accessible with the given API key."""
+async def _cached(cache: Optional[dict], key: str, probe: Callable[[], Awaitable[Optional[bool]]]) -> bool:
+    """Return a fresh cached result for ``key``, or run ``probe`` and cache it.
+    
+    Keys carry a hash of the API key, so a new key never reuses old results;
+    otherwise entries expire after PROBE_CACHE_TTL seconds.
+    """
+    if cache is not None:
+        entry = cache.get(key)
+        if entry and time.time() - entry["ts"] < PROBE_CACHE_TTL:
+            return entry["ok"]
+    
+    # A cancelled probe raises out of here, and a failed request returns
+    # None; neither is a real answer, so only completed probes are cached
+    ok = await probe()
+    if ok is None:
+        return False
+    if cache is not None:
+        cache[key] = {"ok": ok, "ts": time.time()}
+    return ok
+
+async def test_model(client: httpx.AsyncClient, model_id: str, cache: dict = None) -> bool:
+    """Test if a model is accessible with the client's API key.
+    
+    Results are read from and written to ``cache`` when given.
+    """
+    key = _cache_key(client.headers.get("Authorization", ""), model_id)
+    return await _cached(cache, key, lambda: _probe_model(client, model_id))
+
+async def model_listed(client: httpx.AsyncClient, model_id: str, cache: dict = None) -> bool:
+    """Check the read-only model index; no inference is triggered.
+    
+    Results are read from and written to ``cache`` when given.
+    """
+    key = "listed:" + _cache_key(client.headers.get("Authorization", ""), model_id)
+    return await _cached(cache, key, lambda: _model_listed(client, model_id))
+
+async def _model_listed(client: httpx.AsyncClient, model_id: str) -> Optional[bool]:
+    """Look one model up in the model index; None if the request failed."""
+    try:
+        response = await client.get(f"https://huggingface.co/api/models/{model_id}")
+        return response.status_code == 200
+    except Exception:
+        return None
+
+async def _probe_model(client: httpx.AsyncClient, model_id: str) -> Optional[bool]:
+    """Run a minimal inference request against one model; None if it failed."""
     try:
-        response = httpx.post(
+        # Only the status matters, so close the stream without reading the body
+        async with client.stream(
+            "POST",
             f"https://api-inference.huggingface.co/models/{model_id}",
-            headers={"Authorization": f"Bearer {api_key}"},
-            json={"inputs": "Hello"},
-            timeout=30
-        )
-        # 200 = success, 503 = model loading (still valid)
-        return response.status_code in [200, 503]
-    except:
-        return False
+            json={"inputs": "Hello"}
+        ) as response:
+            # 200 = success, 503 = model loading (still valid)
+            return response.status_code in [200, 503]
+    except Exception:
+        return None
 
 def update_env_file(api_key: str, model_id: str):
     """Update the .env file with new API key and model."""
-    env_path = Path(__file__).parent.parent / ".env"
+    env_path = ENV_PATH
     
     if not env_path.exists():
         print(f"❌ .env file not found at {env_path}")
         return False
     
-    # Read current .env content
-    with open(env_path, 'r') as f:
+    # The .env is small and ASCII: rebuild it as bytes, emit it with raw
+    # unbuffered writes to a sibling temp file, then swap it in atomically
+    with open(env_path, 'rb') as f:
         lines = f.readlines()
     
-    # Update HF_API_KEY and HF_MODEL_ID
     updated_lines = []
     hf_api_key_updated = False
     hf_model_id_updated = False
     
     for line in lines:
-        if line.startswith('HF_API_KEY='):
-            updated_lines.append(f'HF_API_KEY={api_key}\n')
+        if line.startswith(b'HF_API_KEY='):
+            updated_lines.append(f'HF_API_KEY={api_key}\n'.encode())
             hf_api_key_updated = True
-        elif line.startswith('HF_MODEL_ID='):
-            updated_lines.append(f'HF_MODEL_ID={model_id}\n')
+        elif line.startswith(b'HF_MODEL_ID='):
+            updated_lines.append(f'HF_MODEL_ID={model_id}\n'.encode())
             hf_model_id_updated = True
         else:
             updated_lines.append(line)
     
     # Add missing entries if not found
+    if updated_lines and not updated_lines[-1].endswith(b'\n'):
+        updated_lines[-1] += b'\n'
     if not hf_api_key_updated:
-        updated_lines.append(f'HF_API_KEY={api_key}\n')
+        updated_lines.append(f'HF_API_KEY={api_key}\n'.encode())
     if not hf_model_id_updated:
-        updated_lines.append(f'HF_MODEL_ID={model_id}\n')
+        updated_lines.append(f'HF_MODEL_ID={model_id}\n'.encode())
     
-    # Write back to file
-    with open(env_path, 'w') as f:
-        f.writelines(updated_lines)
+    # The temp file takes .env's own mode so the secrets never become
+    # world-readable, and is removed if anything fails before the swap
+    data = b''.join(updated_lines)
+    tmp_path = env_path.with_suffix('.tmp')
+    mode = env_path.stat().st_mode & 0o777
+    try:
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode)
+        with open(fd, 'wb', buffering=0) as f:
+            view = memoryview(data)
+            while view:
+                view = view[f.write(view):]
+        os.chmod(tmp_path, mode)  # O_CREAT mode is masked by the umask
+        os.replace(tmp_path, env_path)
+    except OSError as e:
+        tmp_path.unlink(missing_ok=True)
+        print(f"❌ Could not write {env_path}: {e}")
+        return False
     
     print(f"✅ Updated .env file with new API key and model")
     return True
 
-def main():
+async def main():
+    # One pooled client so every request reuses the same connections
+    async with make_client() as client:
+        return await run_setup(client)
+
+async def run_setup(client: httpx.AsyncClient):
     print("🚀 Hugging Face API Setup for Bubu Agent")
     print("=" * 50)
     
-    # Recommended models (known to work well)
-    recommended_models = [
-        "openai/gpt-oss-20b",          # Best: Advanced conversational AI
-        "openai/gpt-oss-120b",         # Premium: Larger model if you have resources
-        "microsoft/DialoGPT-medium",   # Fallback: Older but reliable
-        "microsoft/DialoGPT-small",    # Lightweight: For limited resources
-        "gpt2-medium",                 # Basic: Simple text generation
-        "facebook/blenderbot-400M-distill"  # Alternative: Facebook's model
-    ]
-    
     print("\n📋 STEP 1: Get a Hugging Face API Key")
     print("1. Go to https://huggingface.co/settings/tokens")
     print("2. Create a new token (read access is sufficient)")
@@ -98,20 +206,20 @@ def main():
     
     # Get API key from user
     while True:
-        api_key = input("\nEnter your Hugging Face API key: ").strip()
+        api_key = read_line("\nEnter your Hugging Face API key: ").strip()
         
         if not api_key:
             print("❌ Please enter an API key")
             continue
             
-        if not api_key.startswith('hf_'):
-            print("⚠️  API key should start with 'hf_'. Are you sure this is correct? (y/n)")
-            confirm = input().strip().lower()
-            if confirm not in ['y', 'yes']:
-                continue
+        # Reject malformed keys before spending a network round trip
+        if not _HF_KEY_RE.match(api_key):
+            print("❌ API key looks malformed. It should be 'hf_' followed by 30-50 letters or digits.")
+            continue
         
         print("🔍 Testing API key...")
-        if test_api_key(api_key):
+        client.headers["Authorization"] = f"Bearer {api_key}"
+        if await test_api_key(client):
             print("✅ API key is valid!")
             break
         else:
@@ -121,14 +229,35 @@ def main():
     print(f"\n📋 STEP 2: Choose a Model")
     print("Testing recommended models...")
     
+    # Probe models concurrently; unless --probe-all is given, stop at the first
+    # working model in priority order and cancel the remaining probes
+    probe_all = "--probe-all" in sys.argv or os.environ.get("PROBE_ALL") == "1"
+    cache = load_cache()
+    
+    # Metadata lookups first; only listed models get an inference probe
+    listed = await asyncio.gather(*(model_listed(client, model, cache) for model in RECOMMENDED_MODELS))
+    tasks = {
+        model: asyncio.create_task(test_model(client, model, cache))
+        for model, ok in zip(RECOMMENDED_MODELS, listed) if ok
+    }
+    
     working_models = []
-    for model in recommended_models:
-        print(f"   Testing {model}...", end=" ")
-        if test_model(api_key, model):
-            print("✅")
-            working_models.append(model)
-        else:
-            print("❌")
+    try:
+        for model in RECOMMENDED_MODELS:
+            try:
+                ok = model in tasks and await tasks[model]
+            except Exception:
+                ok = False
+            print(f"   Testing {model}... {'✅' if ok else '❌'}")
+            if ok:
+                working_models.append(model)
+                if not probe_all:
+                    break
+    finally:
+        for task in tasks.values():
+            task.cancel()
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+    save_cache(cache)
     
     if not working_models:
         print("❌ No recommended models are working. You may need to wait or try later.")
@@ -171,7 +300,7 @@ def main():
 
 if __name__ == "__main__":
     try:
-        sys.exit(main())
+        sys.exit(asyncio.run(main()))
     except KeyboardInterrupt:
         print("\n\n👋 Setup cancelled.")
         sys.exit(1)
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Switch Bubu Agent to another WhatsApp provider
+
+This script writes a fresh .env configured for Meta WhatsApp Cloud API
+or Ultramsg WhatsApp API, backing up the current one first.
+
+Usage: python setup/switch_provider.py --provider {meta,ultramsg}
+"""
+
+import argparse
+import os
+import shutil
+import sys
+from datetime import datetime
+from string import Template
+from typing import Final
+
+ENV_TEMPLATE: Final[Template] = Template("""# =============================================================================
+# ${setup_heading}
+# =============================================================================
+
+# =============================================================================
+# CORE SETTINGS
+# =============================================================================
+
+# Enable/disable the service
+ENABLED=true
+
+# Your girlfriend's name (used in message personalization)
+GF_NAME=YourGirlfriendName
+
+# Your girlfriend's WhatsApp number (E.164 format: +[country code][number])
+GF_WHATSAPP_NUMBER=+1234567890
+
+# Your WhatsApp number (for testing and logging)
+SENDER_WHATSAPP_NUMBER=+1234567890
+
+# =============================================================================
+# HUGGING FACE AI SETTINGS
+# =============================================================================
+
+# Your Hugging Face API key (get from https://huggingface.co/settings/tokens)
+HF_API_KEY=your_huggingface_api_key
+
+# AI model to use for message generation
+HF_MODEL_ID=openai/gpt-oss-20b
+
+# =============================================================================
+# WHATSAPP PROVIDER SETTINGS
+# =============================================================================
+
+# Choose your WhatsApp provider: "${provider}" (recommended for free tier)
+WHATSAPP_PROVIDER=${provider}
+
+${provider_settings}# =============================================================================
+# API SECURITY
+# =============================================================================
+
+# Secure bearer token for API authentication
+API_BEARER_TOKEN=your_secure_bearer_token_here
+
+# =============================================================================
+# OPTIONAL SETTINGS
+# =============================================================================
+
+# Timezone for scheduling (default: Asia/Kolkata)
+TIMEZONE=Asia/Kolkata
+
+# Tone for flirty messages: "playful", "romantic", or "witty"
+DAILY_FLIRTY_TONE=playful
+
+# Dates to skip sending messages (YYYY-MM-DD format, comma-separated)
+# SKIP_DATES=2024-01-01,2024-12-25
+
+# Log level: "DEBUG", "INFO", "WARNING", "ERROR"
+LOG_LEVEL=INFO
+""")
+
+# Everything that differs between providers
+PROVIDER_CONFIG: Final[dict] = {
+    "meta": {
+        "name": "Meta WhatsApp",
+        "setup_heading": "META WHATSAPP CLOUD API SETUP",
+        "provider_settings": """# =============================================================================
+# META WHATSAPP CLOUD API SETTINGS (FREE TIER)
+# =============================================================================
+
+# Your Meta Access Token (get from Meta Developer Console)
+META_ACCESS_TOKEN=your_meta_access_token_here
+
+# Your Meta Phone Number ID (get from Meta Developer Console)
+META_PHONE_NUMBER_ID=your_phone_number_id_here
+
+""",
+        "next_steps": """
+==================================================
+📋 NEXT STEPS:
+==================================================
+
+1. 🏗️  Create Meta Developer Account:
+   Visit: https://developers.facebook.com/apps/
+   Click 'Create App' → 'Business' → 'Next'
+
+2. 📱 Add WhatsApp Product:
+   In your app dashboard:
+   Click 'Add Product' → Find 'WhatsApp' → 'Set Up'
+
+3. 🔑 Get Your Credentials:
+   - Access Token: WhatsApp → Getting Started
+   - Phone Number ID: WhatsApp → Phone Numbers
+
+4. ⚙️  Update .env file:
+   Edit .env and replace:
+   - META_ACCESS_TOKEN=your_actual_token
+   - META_PHONE_NUMBER_ID=your_actual_id
+   - GF_WHATSAPP_NUMBER=+1234567890 (her number)
+
+5. 🧪 Test the setup:
+   uvicorn setup.app:app --host 0.0.0.0 --port 8000
+   python interactive_sender.py
+
+📖 For detailed instructions, see: FREE_WHATSAPP_APIS.md
+
+🎯 Why Meta WhatsApp is better:
+   ✅ 1000 messages/month FREE
+   ✅ No 24-hour window restriction
+   ✅ Direct messaging capability
+   ✅ Production-ready
+""",
+    },
+    "ultramsg": {
+        "name": "Ultramsg WhatsApp",
+        "setup_heading": "ULTRAMSG WHATSAPP API SETUP",
+        "provider_settings": """# =============================================================================
+# ULTRAMSG WHATSAPP API SETTINGS (FREE TIER)
+# =============================================================================
+
+# Your Ultramsg API Key (get from ultramsg.com dashboard)
+ULTRAMSG_API_KEY=your_ultramsg_api_key_here
+
+# Your Ultramsg Instance ID (get from ultramsg.com dashboard)
+ULTRAMSG_INSTANCE_ID=your_ultramsg_instance_id_here
+
+""",
+        "next_steps": """
+==================================================
+📋 NEXT STEPS:
+==================================================
+
+1. 🌐 Create Ultramsg Account:
+   Visit: https://ultramsg.com
+   Click 'Sign Up' and create your account
+
+2. 📱 Set Up WhatsApp Instance:
+   In your Ultramsg dashboard:
+   - Click 'Add Instance'
+   - Choose 'WhatsApp'
+   - Follow the QR code setup
+
+3. 🔑 Get Your Credentials:
+   - API Key: Dashboard → API → Copy your API key
+   - Instance ID: Dashboard → Instances → Copy Instance ID
+
+4. ⚙️  Update .env file:
+   Edit .env and replace:
+   - ULTRAMSG_API_KEY=your_actual_api_key
+   - ULTRAMSG_INSTANCE_ID=your_actual_instance_id
+   - GF_WHATSAPP_NUMBER=+1234567890 (her number)
+
+5. 🧪 Test the setup:
+   uvicorn setup.app:app --host 0.0.0.0 --port 8000
+   python interactive_sender.py
+
+📖 For detailed instructions, see: ULTRAMSG_SETUP_GUIDE.md
+
+🎯 Why Ultramsg is great:
+   ✅ Free tier available
+   ✅ Simple setup process
+   ✅ Good documentation
+   ✅ Reliable delivery
+""",
+    },
+}
+
+def render_env(provider: str) -> str:
+    """Render the .env content for a provider."""
+    settings = PROVIDER_CONFIG[provider]
+    return ENV_TEMPLATE.substitute(
+        setup_heading=settings["setup_heading"],
+        provider=provider,
+        provider_settings=settings["provider_settings"],
+    )
+
+def main(provider: str):
+    settings = PROVIDER_CONFIG[provider]
+    print(f"🔄 Bubu Agent - Switch to {settings['name']}")
+    print("=" * 50)
+
+    # Backup current .env
+    if os.path.exists('.env'):
+        backup_name = f'.env.backup.{datetime.now().strftime("%Y%m%d_%H%M%S")}'
+        shutil.copy('.env', backup_name)
+        print(f"✅ Backed up current .env to {backup_name}")
+
+    # Create new .env with the provider's configuration
+    with open('.env', 'w') as f:
+        f.write(render_env(provider))
+
+    print(f"✅ Created new .env file configured for {settings['name']}")
+
+    sys.stdout.write(settings["next_steps"])
+
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Switch Bubu Agent to another WhatsApp provider")
+    parser.add_argument("--provider", choices=sorted(PROVIDER_CONFIG), required=True, help="WhatsApp provider to configure")
+    args = parser.parse_args()
+    sys.exit(main(args.provider))
@@ -14,10 +14,19 @@ def fixed_seed_date() -> date:
     return date(2024, 1, 15)
 
 
-@pytest.fixture
+def _freeze(value: Any) -> Any:
+    """Recursively turn lists into tuples so shared fixture data can't be mutated."""
+    if isinstance(value, dict):
+        return {key: _freeze(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+@pytest.fixture(scope="session")
 def sample_config() -> dict[str, Any]:
-    """Return sample configuration for testing."""
-    return {
+    """Return sample configuration for testing (built once per session, lists frozen)."""
+    return _freeze({
         "general": {
             "max_message_length": 700,
             "max_emojis": 5,
@@ -113,7 +122,25 @@ def sample_config() -> dict[str, Any]:
             "timeout_seconds": 30,
             "max_retries": 3
         }
-    }
+    })
+
+
+@pytest.fixture(scope="session")
+def shared_llm():
+    """Create one Hugging Face LLM client for the whole test session."""
+    from providers.huggingface_llm import HuggingFaceLLM
+    from utils.config import config
+    return HuggingFaceLLM(
+        api_key=config.settings.hf_api_key,
+        model_id=config.settings.hf_model_id
+    )
+
+
+@pytest.fixture(scope="session")
+def shared_composer(shared_llm):
+    """Create one message composer (and song recommender) for the whole test session."""
+    from utils.compose_refactored import create_message_composer_refactored
+    return create_message_composer_refactored(shared_llm)
 
 
 @pytest.fixture
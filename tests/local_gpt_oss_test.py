@@ -2,35 +2,86 @@
 """Test script for OpenAI GPT-OSS-20B local model loading and inference."""
 
 import os
+
+import torch
+import transformers
 from transformers import AutoModelForCausalLM, AutoTokenizer
 
+# Keep the output to this script's own prints
+transformers.logging.set_verbosity_error()
+transformers.utils.logging.disable_progress_bar()
+
 # Allow override via env var; default to GPT-OSS-20B
 model_name = os.getenv("LOCAL_LLM_MODEL", "openai/gpt-oss-20b")
 
+TEST_PROMPTS = [
+    "Give me a short introduction to large language model.",
+    "Write a one-line good morning message for my partner.",
+    "Suggest a cute nickname for someone who loves chai.",
+]
+
 print(f"🧪 Testing GPT-OSS model: {model_name}")
 print("⚠️  Note: First run will download ~10GB model files")
 
-tokenizer = AutoTokenizer.from_pretrained(model_name, trust_remote_code=True)
+# After the first download, load straight from the local cache without Hub checks
+hub_kwargs = {}
+try:
+    from huggingface_hub import try_to_load_from_cache
+    if isinstance(try_to_load_from_cache(model_name, "config.json"), str):
+        hub_kwargs["local_files_only"] = True
+except Exception:
+    pass
+
+# Left padding keeps every prompt flush against its generated tokens
+tokenizer = AutoTokenizer.from_pretrained(model_name, trust_remote_code=True, use_fast=True, padding_side="left", **hub_kwargs)
+if tokenizer.pad_token is None:
+    tokenizer.pad_token = tokenizer.eos_token
+# Half precision with fused SDPA attention on GPU; CPU keeps the checkpoint dtype
+if torch.cuda.is_available():
+    dtype = torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+    attn_implementation = "sdpa"
+else:
+    dtype, attn_implementation = "auto", "eager"
+
 model = AutoModelForCausalLM.from_pretrained(
     model_name,
-    torch_dtype="auto",
+    torch_dtype=dtype,
     device_map="auto",
     trust_remote_code=True,
     low_cpu_mem_usage=True,
+    **hub_kwargs,
+    attn_implementation=attn_implementation,
 )
+assert model.config.use_cache, "KV cache is disabled in the model config"
 
-prompt = "Give me a short introduction to large language model."
-messages = [{"role": "user", "content": prompt}]
+# Run all prompts through a single padded generate call, rendering and
+# tokenizing the chat template in one pass
+inputs = tokenizer.apply_chat_template(
+    [[{"role": "user", "content": prompt}] for prompt in TEST_PROMPTS],
+    add_generation_prompt=True,
+    tokenize=True,
+    padding=True,
+    return_tensors="pt",
+    return_dict=True,
+).to(model.device)
 
-text = tokenizer.apply_chat_template(messages, tokenize=False, add_generation_prompt=True)
-inputs = tokenizer([text], return_tensors="pt").to(model.device)
+# Optional: compile the forward pass to cut per-token Python dispatch. The
+# padded batch keeps shapes static; one short warmup caches the graphs.
+if os.getenv("BUBU_COMPILE", "0") == "1":
+    model.forward = torch.compile(model.forward, mode="reduce-overhead", dynamic=False)
+    with torch.inference_mode():
+        model.generate(**inputs, max_new_tokens=8, pad_token_id=tokenizer.pad_token_id)
 
-generated = model.generate(
-    **inputs,
-    max_new_tokens=128,
-    do_sample=True,
-    top_p=0.9,
-    temperature=0.8,
-)
-output_ids = generated[0][len(inputs.input_ids[0]):]
-print("content:", tokenizer.decode(output_ids, skip_special_tokens=True))
+# BUBU_GREEDY=1 gives a deterministic perf baseline: no per-step sampling
+gen_kwargs = dict(max_new_tokens=128, use_cache=True, pad_token_id=tokenizer.pad_token_id)
+if os.getenv("BUBU_GREEDY", "0") == "1":
+    gen_kwargs.update(do_sample=False, num_beams=1)
+else:
+    gen_kwargs.update(do_sample=True, top_p=0.9, temperature=0.8)
+
+with torch.inference_mode():
+    generated = model.generate(**inputs, **gen_kwargs)
+prompt_len = inputs.input_ids.shape[1]
+for prompt, output_ids in zip(TEST_PROMPTS, generated):
+    print(f"\nprompt: {prompt}")
+    print("content:", tokenizer.decode(output_ids[prompt_len:], skip_special_tokens=True))
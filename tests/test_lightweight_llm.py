@@ -1,9 +1,15 @@
 #!/usr/bin/env python3
 """Lightweight test for LLM functionality with automatic fallback to compatible models."""
 
+import os
 import sys
 import asyncio
+import importlib.util
+import multiprocessing
 from pathlib import Path
+from typing import Optional
+
+import pytest
 
 # Add project root to path
 project_root = Path(__file__).parent.parent
@@ -13,66 +19,142 @@ from utils.llm_factory import create_llm
 from utils.config import config
 from providers.local_transformers_llm import LocalTransformersLLM
 
-async def test_lightweight_llm():
-    """Test LLM with automatic fallback to compatible models."""
+# Weight quantization per candidate so the larger models fit in RAM. With
+# torchao installed GPT-OSS-20B gets fp8 weights (int8 below sm89), which
+# fits in ~10-17GB of VRAM. The bitsandbytes choices (int8, nf4) only apply
+# on CUDA; on CPU-only hosts the loader falls back to unquantized weights.
+QUANTIZATION = {
+    "openai/gpt-oss-20b": "float8_weight_only" if importlib.util.find_spec("torchao") else "int8",
+    "microsoft/DialoGPT-medium": "nf4",
+}
+
+def _try_model(model_id: str) -> tuple[Optional[str], Optional[str]]:
+    """Load one model and generate a short message in this (worker) process.
+    
+    Returns the generated text (or None) and an error string (or None). The
+    model's memory is reclaimed by the OS when the worker exits.
+    """
+    try:
+        llm = LocalTransformersLLM(model_id=model_id, quantization=QUANTIZATION.get(model_id))
+        result = asyncio.run(llm.generate_text(
+            system_prompt="You are a loving partner creating a short romantic message.",
+            user_prompt="Create a brief good morning message for Preeti.",
+            max_new_tokens=50,  # Keep it short for faster testing
+            temperature=0.8,
+            top_p=0.9,
+            do_sample=True
+        ))
+        return result, None
+    except Exception as e:
+        return None, str(e)[:100]
+
+def _worker_count() -> int:
+    """One worker per ~2GB of available RAM, at most two."""
+    try:
+        import psutil
+        return max(1, min(2, psutil.virtual_memory().available // (2 * 1024**3)))
+    except ImportError:
+        return 1
+
+def _probe_in_child(model_id: str, conn) -> None:
+    """Worker process body: probe one model and send back (text, error)."""
+    conn.send(_try_model(model_id))
+    conn.close()
+
+async def _probe_in_process(model_id: str, slots: asyncio.Semaphore) -> tuple[Optional[str], Optional[str]]:
+    """Probe one model in its own process, started once a slot is free.
+    
+    The process is always terminated on the way out, so a cancelled probe
+    stops loading its model instead of running on in the background.
+    """
+    async with slots:
+        # spawn, not fork: the parent may already have initialized CUDA
+        ctx = multiprocessing.get_context("spawn")
+        reader, writer = ctx.Pipe(duplex=False)
+        process = ctx.Process(target=_probe_in_child, args=(model_id, writer), daemon=True)
+        process.start()
+        writer.close()
+        try:
+            # The reply is a short message, so it fits in the pipe buffer and
+            # the child can exit before it is read
+            await asyncio.to_thread(process.join)
+            if reader.poll():
+                return reader.recv()
+            # Worker died without replying (e.g. killed for memory)
+            return None, f"worker exited with code {process.exitcode}"
+        finally:
+            process.terminate()
+            await asyncio.to_thread(process.join)
+            reader.close()
+
+async def find_working_model() -> Optional[str]:
+    """Probe the candidate models and return the most preferred one that generates a message."""
     print("🧪 Testing Lightweight LLM with Fallback Support")
     print("=" * 55)
     
+    # Test with different models in order of preference
+    test_models = [
+        "openai/gpt-oss-20b",      # Primary choice (if GPU available)
+        "microsoft/DialoGPT-medium", # Fallback 1 (CPU friendly)
+        "microsoft/DialoGPT-small",  # Fallback 2 (very lightweight)
+        "gpt2"                       # Last resort (basic)
+    ]
+    
+    successful_model = None
+    
+    # Each model loads and probes in its own process, as many at once as
+    # memory allows. Results are read in preference order, so a small model
+    # finishing first never beats a working preferred one.
+    slots = asyncio.Semaphore(_worker_count())
+    tasks = [asyncio.create_task(_probe_in_process(model_id, slots)) for model_id in test_models]
     try:
-        # Test with different models in order of preference
-        test_models = [
-            "openai/gpt-oss-20b",      # Primary choice (if GPU available)
-            "microsoft/DialoGPT-medium", # Fallback 1 (CPU friendly)
-            "microsoft/DialoGPT-small",  # Fallback 2 (very lightweight)
-            "gpt2"                       # Last resort (basic)
-        ]
-        
-        successful_model = None
-        
-        for model_id in test_models:
-            print(f"\n🔄 Testing model: {model_id}")
-            try:
-                # Create LLM instance directly
-                llm = LocalTransformersLLM(model_id=model_id)
-                print(f"✅ Model loaded: {model_id}")
-                
-                # Test simple generation
-                print("⏳ Testing message generation...")
-                result = await llm.generate_text(
-                    system_prompt="You are a loving partner creating a short romantic message.",
-                    user_prompt="Create a brief good morning message for Preeti.",
-                    max_new_tokens=50,  # Keep it short for faster testing
-                    temperature=0.8,
-                    top_p=0.9,
-                    do_sample=True
-                )
-                
-                if result and result.strip():
-                    print("✅ Message generated successfully!")
-                    print(f"📝 Generated message: {result}")
-                    print(f"📊 Message length: {len(result)} characters")
-                    successful_model = model_id
-                    break
-                else:
-                    print("❌ No message generated")
-                    
-            except Exception as e:
-                print(f"❌ Model failed: {str(e)[:100]}...")
-                continue
-        
-        if successful_model:
-            print(f"\n🎉 Success! Working model: {successful_model}")
-            print("\n💡 To use this model permanently, update your configuration:")
-            print(f"   HF_MODEL_ID={successful_model}")
-        else:
-            print("\n❌ No models worked. Check your system resources and dependencies.")
+        for model_id, task in zip(test_models, tasks):
+            result, error = await task
+            print(f"\n🔄 Tested model: {model_id}")
             
+            if error:
+                print(f"❌ Model failed: {error}...")
+            elif result and result.strip():
+                print("✅ Message generated successfully!")
+                print(f"📝 Generated message: {result}")
+                print(f"📊 Message length: {len(result)} characters")
+                successful_model = model_id
+                break
+            else:
+                print("❌ No message generated")
+    finally:
+        # Stop the less preferred candidates still queued or loading
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    
+    return successful_model
+
+@pytest.fixture(scope="session")
+async def working_model() -> Optional[str]:
+    """Id of the preferred working lightweight model, searched for once per session.
+    
+    Only the id is kept: the model was already loaded and exercised in its
+    probe process, so it is not loaded a second time here.
+    """
+    try:
+        return await find_working_model()
     except Exception as e:
         print(f"❌ Test failed: {e}")
         import traceback
         traceback.print_exc()
+        return None
 
-async def test_system_resources():
+async def test_lightweight_llm(working_model: Optional[str]):
+    """Test LLM with automatic fallback to compatible models."""
+    if working_model:
+        print(f"\n🎉 Success! Working model: {working_model}")
+        print("\n💡 To use this model permanently, update your configuration:")
+        print(f"   HF_MODEL_ID={working_model}")
+    else:
+        print("\n❌ No models worked. Check your system resources and dependencies.")
+
+def test_system_resources():
     """Check system resources and provide recommendations."""
     print("\n🔧 System Resource Check")
     print("=" * 30)
@@ -83,24 +165,34 @@ async def test_system_resources():
         
         # Check available RAM
         memory = psutil.virtual_memory()
-        print(f"💾 Available RAM: {memory.available / (1024**3):.1f} GB / {memory.total / (1024**3):.1f} GB")
+        avail_gb = memory.available / (1024**3)
+        total_gb = memory.total / (1024**3)
+        print(f"💾 Available RAM: {avail_gb:.1f} GB / {total_gb:.1f} GB")
         
         # Check GPU availability
-        if torch.cuda.is_available():
-            gpu_count = torch.cuda.device_count()
+        cuda_available = torch.cuda.is_available()
+        gpu_count = torch.cuda.device_count() if cuda_available else 0
+        vram_gb = 0.0
+        if cuda_available:
             print(f"🎮 GPU available: {gpu_count} device(s)")
             for i in range(gpu_count):
-                gpu_name = torch.cuda.get_device_name(i)
-                gpu_memory = torch.cuda.get_device_properties(i).total_memory / (1024**3)
-                print(f"   GPU {i}: {gpu_name} ({gpu_memory:.1f} GB)")
+                # One driver query per device: the properties carry the name too
+                props = torch.cuda.get_device_properties(i)
+                gpu_gb = props.total_memory / (1024**3)
+                vram_gb = max(vram_gb, gpu_gb)
+                print(f"   GPU {i}: {props.name} ({gpu_gb:.1f} GB)")
         else:
             print("🎮 GPU: Not available (CPU-only mode)")
         
         # Recommendations
         print("\n📋 Recommendations:")
-        if memory.available / (1024**3) >= 16:
+        if vram_gb >= 10:
+            print("✅ Enough VRAM for GPT-OSS-20B with int8/fp8 weights (pip install torchao)")
+        elif cuda_available:
+            print("⚠️  Under 10GB VRAM - DialoGPT-medium recommended")
+        elif avail_gb >= 16:
             print("✅ Sufficient RAM for GPT-OSS-20B")
-        elif memory.available / (1024**3) >= 8:
+        elif avail_gb >= 8:
             print("⚠️  Limited RAM - DialoGPT-medium recommended")
         else:
             print("❌ Low RAM - DialoGPT-small or GPT-2 recommended")
@@ -108,6 +200,18 @@ async def test_system_resources():
     except ImportError:
         print("❌ Cannot check system resources (missing dependencies)")
 
+def _quiet_transformers():
+    """Silence transformers' progress bars and INFO logs; the script prints its own output."""
+    os.environ.setdefault("TRANSFORMERS_NO_ADVISORY_WARNINGS", "1")
+    import transformers
+    transformers.logging.set_verbosity_error()
+    transformers.utils.logging.disable_progress_bar()
+
+async def _main():
+    """Script entry point: one event loop for the whole run."""
+    test_system_resources()
+    await test_lightweight_llm(await find_working_model())
+
 if __name__ == "__main__":
-    asyncio.run(test_system_resources())
-    asyncio.run(test_lightweight_llm())
+    _quiet_transformers()
+    asyncio.run(_main())
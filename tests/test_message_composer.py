@@ -3,19 +3,28 @@
 from __future__ import annotations
 
 import asyncio
-from datetime import date
+from datetime import date, timedelta
 from typing import Any, Dict, List, Optional
 from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 
 from utils.compose_refactored import MessageComposer
+from utils.storage import Storage
+from utils.storage_protocol import StorageProtocolImpl
 from utils.types import (
     GenerationResult, LLMResult, MessageResult, MessageStatus, MessageType,
     NullStorage
 )
 
 
+_DEFAULT_RESPONSES = {
+    MessageType.MORNING: "Good morning test!",
+    MessageType.FLIRTY: "Hey there test!",
+    MessageType.NIGHT: "Good night test!"
+}
+
+
 class FakeLLM:
     """Fake LLM implementation for testing."""
     
@@ -31,32 +40,117 @@ class FakeLLM:
         max_new_tokens: int,
         temperature: float,
         top_p: float,
-        do_sample: bool
+        do_sample: bool,
+        message_type: Optional[MessageType] = None
     ) -> Optional[str]:
         """Return predefined response based on message type."""
         self.call_count += 1
         
-        # Extract message type from system prompt
-        if "morning" in system_prompt.lower():
-            return self.responses.get("morning", "Good morning test!")
-        elif "flirty" in system_prompt.lower():
-            return self.responses.get("flirty", "Hey there test!")
-        elif "night" in system_prompt.lower():
-            return self.responses.get("night", "Good night test!")
-        
-        return self.responses.get("default", "Hello test!")
+        if message_type is None:
+            return self.responses.get("default", "Hello test!")
+        return self.responses.get(message_type.value, _DEFAULT_RESPONSES[message_type])
+
+
+class FakeBatchLLM(FakeLLM):
+    """Fake LLM that also supports batched generation."""
+    
+    def __init__(self, responses: Dict[str, str]):
+        """Initialize with predefined responses."""
+        super().__init__(responses)
+        self.batch_calls = 0
+    
+    async def generate_batch(
+        self,
+        prompts: List[tuple[str, str]],
+        max_new_tokens: int,
+        temperature: float,
+        top_p: float,
+        do_sample: bool
+    ) -> List[Optional[str]]:
+        """Return one response per prompt, picked by the type named in the user prompt."""
+        self.batch_calls += 1
+        await asyncio.sleep(0)
+        return [
+            next(
+                _DEFAULT_RESPONSES[message_type]
+                for message_type in MessageType
+                if message_type.value in user_prompt
+            )
+            for _, user_prompt in prompts
+        ]
+
+
+# Position of each message type, used to pack (date, type) into one int
+_TYPE_INDEX: Dict[MessageType, int] = {message_type: i for i, message_type in enumerate(MessageType)}
+
+
+def _sent_key(date_obj: date, message_type: MessageType) -> int:
+    """Pack a (date, message type) pair into a single int set key."""
+    return (date_obj.toordinal() << 4) | _TYPE_INDEX[message_type]
+
+
+class SlowFakeLLM(FakeLLM):
+    """Fake LLM that takes a fixed time per call and tracks overlapping calls."""
+    
+    DELAY_SECONDS = 0.1
+    
+    def __init__(self, responses: Dict[str, str]):
+        """Initialize with predefined responses."""
+        super().__init__(responses)
+        self.in_flight = 0
+        self.max_in_flight = 0
+    
+    async def generate_text(self, *args, **kwargs) -> Optional[str]:
+        """Sleep, then return the predefined response."""
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.DELAY_SECONDS)
+        finally:
+            self.in_flight -= 1
+        return await super().generate_text(*args, **kwargs)
 
 
 class FakeStorage:
     """Fake storage implementation for testing."""
     
     def __init__(self, sent_messages: List[tuple[date, MessageType]]):
-        """Initialize with list of sent messages."""
-        self.sent_messages = sent_messages
+        """Initialize with the sent messages, packed into int keys."""
+        self._sent: set[int] = {_sent_key(d, mt) for d, mt in sent_messages}
+    
+    def mark_sent(self, date_obj: date, message_type: MessageType) -> None:
+        """Record a message as sent."""
+        self._sent.add(_sent_key(date_obj, message_type))
     
     def is_message_sent(self, date_obj: date, message_type: MessageType) -> bool:
         """Check if message was sent."""
-        return (date_obj, message_type) in self.sent_messages
+        return _sent_key(date_obj, message_type) in self._sent
+
+
+# Template tables built once at import rather than on every lookup
+_PROMPT_TEMPLATES: Dict[tuple[MessageType, str], str] = {
+    (MessageType.MORNING, "system"): "You are sending a morning message to {GF_NAME}.",
+    (MessageType.MORNING, "user"): "Create a morning message for {GF_NAME}.",
+    (MessageType.FLIRTY, "system"): "You are sending a flirty message to {GF_NAME}.",
+    (MessageType.FLIRTY, "user"): "Create a flirty message for {GF_NAME}.",
+    (MessageType.NIGHT, "system"): "You are sending a night message to {GF_NAME}.",
+    (MessageType.NIGHT, "user"): "Create a night message for {GF_NAME}."
+}
+
+_FALLBACK_TEMPLATES: Dict[MessageType, List[str]] = {
+    MessageType.MORNING: [
+        "Good morning {GF_NAME}! Have a wonderful day! {closer}",
+        "Morning {GF_NAME}! You're amazing! {closer}"
+    ],
+    MessageType.FLIRTY: [
+        "Hey {GF_NAME}! You're beautiful! {closer}",
+        "Hi {GF_NAME}! I miss you! {closer}"
+    ],
+    MessageType.NIGHT: [
+        "Good night {GF_NAME}! Sweet dreams! {closer}",
+        "Night {GF_NAME}! Sleep well! {closer}"
+    ]
+}
 
 
 class FakeConfig:
@@ -66,6 +160,7 @@ class FakeConfig:
         """Initialize with test configuration."""
         self.gf_name = "TestGirlfriend"
         self.daily_flirty_tone = "romantic"
+        self.song_settings: Dict[str, Any] = {}
     
     def get_general_setting(self, key: str, default: Any = None) -> Any:
         """Get general setting."""
@@ -86,35 +181,17 @@ class FakeConfig:
         }
         return settings.get(key, default)
     
+    def get_song_recommendation_setting(self, key: str, default: Any = None) -> Any:
+        """Get song recommendation setting (songs are off unless a test enables them)."""
+        return self.song_settings.get(key, default)
+    
     def get_prompt_template(self, message_type: MessageType, template_type: str) -> str:
         """Get prompt template."""
-        templates = {
-            (MessageType.MORNING, "system"): "You are sending a morning message to {GF_NAME}.",
-            (MessageType.MORNING, "user"): "Create a morning message for {GF_NAME}.",
-            (MessageType.FLIRTY, "system"): "You are sending a flirty message to {GF_NAME}.",
-            (MessageType.FLIRTY, "user"): "Create a flirty message for {GF_NAME}.",
-            (MessageType.NIGHT, "system"): "You are sending a night message to {GF_NAME}.",
-            (MessageType.NIGHT, "user"): "Create a night message for {GF_NAME}."
-        }
-        return templates.get((message_type, template_type), "")
+        return _PROMPT_TEMPLATES.get((message_type, template_type), "")
     
     def get_fallback_templates(self, message_type: MessageType) -> List[str]:
         """Get fallback templates."""
-        templates = {
-            MessageType.MORNING: [
-                "Good morning {GF_NAME}! Have a wonderful day! {closer}",
-                "Morning {GF_NAME}! You're amazing! {closer}"
-            ],
-            MessageType.FLIRTY: [
-                "Hey {GF_NAME}! You're beautiful! {closer}",
-                "Hi {GF_NAME}! I miss you! {closer}"
-            ],
-            MessageType.NIGHT: [
-                "Good night {GF_NAME}! Sweet dreams! {closer}",
-                "Night {GF_NAME}! Sleep well! {closer}"
-            ]
-        }
-        return templates.get(message_type, [])
+        return _FALLBACK_TEMPLATES.get(message_type, [])
     
     def get_signature_closers(self) -> List[str]:
         """Get signature closers."""
@@ -129,14 +206,17 @@ class FakeConfig:
         return ["You're the WiFi to my heart!", "Are you a magician?"]
 
 
+FAKE_RESPONSES = {
+    "morning": "Good morning TestGirlfriend! Have an amazing day! — bubu",
+    "flirty": "Hey TestGirlfriend! You're absolutely beautiful! — love",
+    "night": "Good night TestGirlfriend! Sweet dreams! — your bubu"
+}
+
+
 @pytest.fixture
 def fake_llm() -> FakeLLM:
     """Create a fake LLM for testing."""
-    return FakeLLM({
-        "morning": "Good morning TestGirlfriend! Have an amazing day! — bubu",
-        "flirty": "Hey TestGirlfriend! You're absolutely beautiful! — love",
-        "night": "Good night TestGirlfriend! Sweet dreams! — your bubu"
-    })
+    return FakeLLM(dict(FAKE_RESPONSES))
 
 
 @pytest.fixture
@@ -151,13 +231,17 @@ def fake_storage() -> FakeStorage:
     return FakeStorage([])
 
 
-@pytest.fixture
-def composer(fake_llm: FakeLLM, fake_config: FakeConfig, fake_storage: FakeStorage) -> MessageComposer:
-    """Create a message composer for testing."""
+@pytest.fixture(scope="class")
+def composer() -> MessageComposer:
+    """Create one message composer per test class.
+    
+    Tests that need to tweak the LLM, config or storage build their own
+    composer from the function-scoped fakes instead of mutating this one.
+    """
     return MessageComposer(
-        llm=fake_llm,
-        config=fake_config,
-        storage=fake_storage
+        llm=FakeLLM(dict(FAKE_RESPONSES)),
+        config=FakeConfig(),
+        storage=FakeStorage([])
     )
 
 
@@ -185,20 +269,40 @@ class TestMessageComposer:
     @pytest.mark.asyncio
     async def test_compose_message_already_sent(
         self,
-        composer: MessageComposer,
+        fake_llm: FakeLLM,
+        fake_config: FakeConfig,
         fake_storage: FakeStorage,
         fixed_seed_date: date
     ):
         """Test that already sent messages return appropriate status."""
         # Mark message as already sent
-        fake_storage.sent_messages.append((fixed_seed_date, MessageType.MORNING))
+        fake_storage.mark_sent(fixed_seed_date, MessageType.MORNING)
         
+        composer = MessageComposer(fake_llm, fake_config, fake_storage)
         result = await composer.compose_message(MessageType.MORNING, fixed_seed_date)
         
         assert result.status == MessageStatus.ALREADY_SENT
         assert result.text == ""
         assert result.details["message_type"] == "morning"
     
+    @pytest.mark.asyncio
+    async def test_compose_message_already_sent_skips_generation(
+        self,
+        fake_llm: FakeLLM,
+        fake_config: FakeConfig,
+        fake_storage: FakeStorage,
+        fixed_seed_date: date
+    ):
+        """Test that the already-sent check runs before any closer, RNG or LLM work."""
+        fake_storage.mark_sent(fixed_seed_date, MessageType.MORNING)
+        
+        composer = MessageComposer(fake_llm, fake_config, fake_storage)
+        composer._rng = MagicMock(side_effect=AssertionError("RNG used for an already-sent message"))
+        result = await composer.compose_message(MessageType.MORNING, fixed_seed_date)
+        
+        assert result.status == MessageStatus.ALREADY_SENT
+        assert fake_llm.call_count == 0
+    
     @pytest.mark.asyncio
     async def test_compose_message_ai_generated(
         self,
@@ -212,6 +316,137 @@ class TestMessageComposer:
         assert "Good morning TestGirlfriend" in result.text
         assert result.details["message_type"] == "morning"
     
+    @pytest.mark.asyncio
+    async def test_compose_all_messages(
+        self,
+        composer: MessageComposer,
+        fixed_seed_date: date
+    ):
+        """Test composing every message type for a day."""
+        results = await composer.compose_all_messages(fixed_seed_date)
+        
+        assert set(results) == set(MessageType)
+        for message_type, result in results.items():
+            assert result.status == MessageStatus.AI_GENERATED
+            assert result.details["message_type"] == message_type.value
+        assert "Good morning TestGirlfriend" in results[MessageType.MORNING].text
+    
+    @pytest.mark.asyncio
+    async def test_compose_all_messages_overlaps_llm_calls(
+        self,
+        fake_config: FakeConfig,
+        fake_storage: FakeStorage,
+        fixed_seed_date: date
+    ):
+        """Test that per-type LLM calls run concurrently, not one after another."""
+        llm = SlowFakeLLM({})
+        composer = MessageComposer(llm, fake_config, fake_storage)
+        
+        results = await composer.compose_all_messages(fixed_seed_date)
+        
+        assert llm.call_count == len(MessageType)
+        assert all(result.status == MessageStatus.AI_GENERATED for result in results.values())
+        # Serial calls would never have more than one in flight
+        assert llm.max_in_flight == len(MessageType)
+    
+    @pytest.mark.asyncio
+    async def test_compose_all_messages_batched(
+        self,
+        fake_config: FakeConfig,
+        fixed_seed_date: date
+    ):
+        """Test that a batch-capable LLM is called once for all message types."""
+        llm = FakeBatchLLM({})
+        composer = MessageComposer(llm, fake_config, FakeStorage([(fixed_seed_date, MessageType.NIGHT)]))
+        
+        results = await composer.compose_all_messages(fixed_seed_date)
+        
+        assert llm.batch_calls == 1
+        assert llm.call_count == 0
+        assert results[MessageType.MORNING].status == MessageStatus.AI_GENERATED
+        assert "Good morning test" in results[MessageType.MORNING].text
+        assert results[MessageType.FLIRTY].status == MessageStatus.AI_GENERATED
+        assert "Hey there test" in results[MessageType.FLIRTY].text
+        assert results[MessageType.NIGHT].status == MessageStatus.ALREADY_SENT
+    
+    @pytest.mark.asyncio
+    async def test_compose_all_messages_batched_overlapping_days(
+        self,
+        fake_config: FakeConfig,
+        fake_storage: FakeStorage,
+        fixed_seed_date: date
+    ):
+        """Test that overlapping batched calls on one composer keep their own results."""
+        llm = FakeBatchLLM({})
+        composer = MessageComposer(llm, fake_config, fake_storage)
+        next_day = fixed_seed_date + timedelta(days=1)
+        
+        first, second = await asyncio.gather(
+            composer.compose_all_messages(fixed_seed_date),
+            composer.compose_all_messages(next_day)
+        )
+        
+        assert llm.batch_calls == 2
+        # No compose fell back to a per-type call
+        assert llm.call_count == 0
+        for results in (first, second):
+            assert all(result.status == MessageStatus.AI_GENERATED for result in results.values())
+    
+    @pytest.mark.asyncio
+    async def test_plan_daily_songs_overlaps_intent_calls(
+        self,
+        fake_config: FakeConfig,
+        fixed_seed_date: date
+    ):
+        """Test that the per-type song intent calls run concurrently."""
+        llm = SlowFakeLLM({"default": '{"keywords": ["love"]}'})
+        storage = MagicMock()
+        storage.get_recent_song_ids.return_value = set()
+        storage.get_planned_song.return_value = None
+        composer = MessageComposer(llm, fake_config, storage)
+        # Enable songs only after construction, with a stub recommender
+        fake_config.song_settings["song_reco_enabled"] = True
+        composer.song_recommender = MagicMock()
+        composer.song_recommender.recommend_songs_batch.side_effect = lambda query_texts, **_: [
+            {"song_id": f"S{i}", "title": query, "url": f"https://example.com/{i}"}
+            for i, query in enumerate(query_texts)
+        ]
+        
+        planned = await composer.plan_daily_songs(fixed_seed_date)
+        
+        assert set(planned) == set(MessageType)
+        assert llm.max_in_flight == len(MessageType)
+        assert planned[MessageType.MORNING].title == "soft warm motivational romance love"
+    
+    @pytest.mark.asyncio
+    async def test_plan_daily_songs_shared_through_storage(
+        self,
+        fake_config: FakeConfig,
+        fixed_seed_date: date,
+        tmp_path
+    ):
+        """Test that a second composer on the same database reuses the day's plan."""
+        storage = StorageProtocolImpl(Storage(str(tmp_path / "bubu.db")))
+        fake_config.song_settings["song_reco_enabled"] = True
+        
+        def make_composer() -> MessageComposer:
+            composer = MessageComposer(FakeLLM({"default": '{"keywords": ["love"]}'}), fake_config, storage)
+            composer.song_recommender = MagicMock()
+            composer.song_recommender.recommend_songs_batch.side_effect = lambda query_texts, **_: [
+                {"song_id": f"S{i}", "title": query, "url": f"https://example.com/{i}"}
+                for i, query in enumerate(query_texts)
+            ]
+            return composer
+        
+        first = await make_composer().plan_daily_songs(fixed_seed_date)
+        second_composer = make_composer()
+        second = await second_composer.plan_daily_songs(fixed_seed_date)
+        
+        assert second == first
+        second_composer.song_recommender.recommend_songs_batch.assert_not_called()
+        message = await second_composer._add_song_recommendation("Hi", MessageType.NIGHT, fixed_seed_date)
+        assert first[MessageType.NIGHT].url in message
+    
     @pytest.mark.asyncio
     async def test_compose_message_fallback_on_ai_failure(
         self,
@@ -305,6 +540,12 @@ class TestMessageComposer:
         
         assert len(result) <= 20
         assert result.endswith("...")
+        
+        # A ZWJ emoji sequence straddling the cut is dropped whole, not split
+        family = "\U0001f468\u200d\U0001f469\u200d\U0001f467"
+        result = composer._validate_and_trim(f"Hugs{family}from all of us", max_length=10, max_emojis=5)
+        
+        assert result == "Hugs..."
     
     def test_validate_and_trim_exceeds_emojis(self, composer: MessageComposer):
         """Test text validation when exceeding emoji limit."""
@@ -314,6 +555,13 @@ class TestMessageComposer:
         emoji_count = len([c for c in result if ord(c) > 0xFFFF])
         assert emoji_count <= 3
     
+    def test_validate_and_trim_keeps_first_emojis(self, composer: MessageComposer):
+        """Test that emojis beyond the limit are dropped from the end, not the start."""
+        text = "Hi 🌟 there 😀 again 🌟"
+        result = composer._validate_and_trim(text, max_length=100, max_emojis=2)
+        
+        assert result == "Hi 🌟 there 😀 again"
+    
     def test_get_message_preview(self, composer: MessageComposer):
         """Test message preview generation."""
         preview = composer.get_message_preview(MessageType.MORNING)
@@ -415,8 +663,24 @@ class TestMessageComposer:
         rng2 = composer._rng(fixed_seed_date)
         
         # Test that they produce the same sequence
-        assert rng1.random() == rng2.random()
-        assert rng1.random() == rng2.random()
+        ints1 = [rng1.randint(1, 100) for _ in range(10)]
+        ints2 = [rng2.randint(1, 100) for _ in range(10)]
+        floats1 = [rng1.random() for _ in range(10)]
+        floats2 = [rng2.random() for _ in range(10)]
+        
+        assert ints1 == ints2
+        assert floats1 == floats2
+
+
+    def test_rng_independent_per_call(self, composer: MessageComposer, fixed_seed_date: date):
+        """Test that each RNG for a date starts from the beginning of its sequence."""
+        rng1 = composer._rng(fixed_seed_date)
+        first = rng1.random()
+        rng1.random()
+        
+        rng2 = composer._rng(fixed_seed_date)
+        assert rng2.random() == first
+        assert rng2.seed == rng1.seed
 
 
 class TestMessageType:
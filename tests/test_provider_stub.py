@@ -1,234 +1,285 @@
 """Tests for provider functionality."""
 
+import asyncio
+import base64
+from typing import Any, NamedTuple, Optional
+
+import httpx
 import pytest
-from unittest.mock import AsyncMock, MagicMock, patch
+from unittest.mock import patch
 
 from providers.messenger import Messenger
 from providers.twilio_whatsapp import TwilioWhatsApp
 from providers.meta_whatsapp import MetaWhatsApp
+from providers.ultramsg_whatsapp import UltramsgWhatsApp
 from providers.huggingface_llm import HuggingFaceLLM
 
 
-class TestTwilioWhatsApp:
-    """Test Twilio WhatsApp provider."""
+class Reply(NamedTuple):
+    """Immutable canned HTTP reply, shared across tests."""
     
-    @pytest.fixture
-    def twilio_provider(self):
-        """Create Twilio provider."""
-        return TwilioWhatsApp(
+    status_code: int
+    json: Any = None
+    text: Optional[str] = None
+    
+    def to_response(self) -> httpx.Response:
+        """Build a fresh response; httpx binds each one to its request."""
+        return httpx.Response(self.status_code, json=self.json, text=self.text)
+
+
+OK = Reply(200)
+BAD_REQUEST = Reply(400, text="Bad Request")
+NOT_FOUND = Reply(404)
+MODEL_LOADING = Reply(503)
+HF_GREETING = Reply(200, json=[{"generated_text": "Hello! How are you today?"}])
+HF_HELLO = Reply(200, json=[{"generated_text": "Hello!"}])
+
+
+class MockServer:
+    """Canned HTTP replies behind an httpx.MockTransport.
+    
+    Providers are built with ``transport=server.transport``, so requests go
+    through the provider's real client (auth, headers, timeout) and httpx's
+    real request/response path.
+    """
+    
+    def __init__(self):
+        self.requests: list[httpx.Request] = []
+        self.replies: tuple = (OK,)
+        self.transport = httpx.MockTransport(self._handle)
+    
+    def reply(self, *replies) -> list[httpx.Request]:
+        """Answer calls with ``replies`` in order; the last one repeats.
+        
+        A reply that is an exception is raised instead of returned.
+        
+        Returns:
+            The requests sent, in order
+        """
+        self.replies = replies
+        return self.requests
+    
+    def _handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        reply = self.replies[min(len(self.requests), len(self.replies)) - 1]
+        if isinstance(reply, Exception):
+            raise reply
+        return reply.to_response()
+
+
+# Per-provider construction and the responses that mean success
+PROVIDER_CASES = {
+    "twilio": {
+        "create": lambda transport: TwilioWhatsApp(
             account_sid="test_sid",
             auth_token="test_token",
-            from_number="whatsapp:+1234567890"
-        )
+            from_number="whatsapp:+1234567890",
+            transport=transport
+        ),
+        "authorized": lambda request: (
+            request.headers["Authorization"] == "Basic " + base64.b64encode(b"test_sid:test_token").decode()
+        ),
+        "send_path": "/2010-04-01/Accounts/test_sid/Messages.json",
+        "send_reply": Reply(201, json={"sid": "msg_123", "status": "sent"}),
+    },
+    "meta": {
+        "create": lambda transport: MetaWhatsApp(
+            access_token="test_token",
+            phone_number_id="123456789",
+            transport=transport
+        ),
+        "authorized": lambda request: request.url.params["access_token"] == "test_token",
+        "send_path": "/v18.0/123456789/messages",
+        "send_reply": Reply(200, json={"messages": [{"id": "msg_123"}]}),
+    },
+    "huggingface": {
+        "create": lambda transport: HuggingFaceLLM(
+            api_key="test_key",
+            model_id="test/model",
+            transport=transport
+        ),
+        "authorized": lambda request: request.headers["Authorization"] == "Bearer test_key",
+    },
+}
+
+MESSENGERS = ["twilio", "meta"]
+
+
+@pytest.fixture
+def server():
+    """Mock HTTP server that the provider fixtures send their requests to."""
+    return MockServer()
+
+
+@pytest.fixture(params=MESSENGERS)
+async def messenger(request, server):
+    """Create each WhatsApp provider with its expected send endpoint and reply."""
+    case = PROVIDER_CASES[request.param]
+    provider = case["create"](server.transport)
+    yield request.param, provider, case
+    await provider.close()
+
+
+@pytest.fixture(params=list(PROVIDER_CASES))
+async def http_provider(request, server):
+    """Create each HTTP-backed provider, messengers and LLM alike."""
+    case = PROVIDER_CASES[request.param]
+    provider = case["create"](server.transport)
+    yield provider, case
+    await provider.close()
+
+
+class TestMessengers:
+    """Behaviour shared by the WhatsApp providers."""
     
     @pytest.mark.asyncio
-    async def test_send_text_success(self, twilio_provider):
+    async def test_send_text_success(self, messenger, server):
         """Test successful message sending."""
-        with patch('httpx.AsyncClient.post') as mock_post:
-            mock_response = MagicMock()
-            mock_response.status_code = 201
-            mock_response.json.return_value = {"sid": "msg_123", "status": "sent"}
-            mock_post.return_value = mock_response
-            
-            result = await twilio_provider.send_text("+9876543210", "Hello!")
-            
-            assert result == "msg_123"
-            mock_post.assert_called_once()
+        _, provider, case = messenger
+        requests = server.reply(case["send_reply"])
+        
+        result = await provider.send_text("+9876543210", "Hello!")
+        
+        assert result == "msg_123"
+        assert len(requests) == 1
+        assert requests[0].method == "POST"
+        assert requests[0].url.path == case["send_path"]
+        assert case["authorized"](requests[0])
+        assert requests[0].extensions["timeout"]["read"] == 30.0
     
     @pytest.mark.asyncio
-    async def test_send_text_failure(self, twilio_provider):
+    async def test_send_text_failure(self, messenger, server):
         """Test failed message sending."""
-        with patch('httpx.AsyncClient.post') as mock_post:
-            mock_response = MagicMock()
-            mock_response.status_code = 400
-            mock_response.text = "Bad Request"
-            mock_post.return_value = mock_response
-            
-            result = await twilio_provider.send_text("+9876543210", "Hello!")
-            
-            assert result is None
+        _, provider, _ = messenger
+        server.reply(BAD_REQUEST)
+        
+        result = await provider.send_text("+9876543210", "Hello!")
+        
+        assert result is None
     
     @pytest.mark.asyncio
-    async def test_send_text_exception(self, twilio_provider):
+    async def test_send_text_exception(self, messenger, server):
         """Test exception during message sending."""
-        with patch('httpx.AsyncClient.post') as mock_post:
-            mock_post.side_effect = Exception("Network error")
-            
-            result = await twilio_provider.send_text("+9876543210", "Hello!")
-            
-            assert result is None
-    
-    @pytest.mark.asyncio
-    async def test_is_available_success(self, twilio_provider):
-        """Test availability check success."""
-        with patch('httpx.AsyncClient.get') as mock_get:
-            mock_response = MagicMock()
-            mock_response.status_code = 200
-            mock_get.return_value = mock_response
-            
-            result = await twilio_provider.is_available()
-            
-            assert result is True
-    
-    @pytest.mark.asyncio
-    async def test_is_available_failure(self, twilio_provider):
-        """Test availability check failure."""
-        with patch('httpx.AsyncClient.get') as mock_get:
-            mock_response = MagicMock()
-            mock_response.status_code = 401
-            mock_get.return_value = mock_response
-            
-            result = await twilio_provider.is_available()
-            
-            assert result is False
+        _, provider, _ = messenger
+        server.reply(httpx.ConnectError("Network error"))
+        
+        result = await provider.send_text("+9876543210", "Hello!")
+        
+        assert result is None
     
-    def test_get_provider_name(self, twilio_provider):
+    def test_get_provider_name(self, messenger):
         """Test provider name."""
-        assert twilio_provider.get_provider_name() == "twilio"
+        name, provider, _ = messenger
+        assert provider.get_provider_name() == name
 
 
-class TestMetaWhatsApp:
-    """Test Meta WhatsApp provider."""
-    
-    @pytest.fixture
-    def meta_provider(self):
-        """Create Meta provider."""
-        return MetaWhatsApp(
-            access_token="test_token",
-            phone_number_id="123456789"
-        )
+class TestHttpProviders:
+    """Behaviour shared by every HTTP-backed provider."""
     
     @pytest.mark.asyncio
-    async def test_send_text_success(self, meta_provider):
-        """Test successful message sending."""
-        with patch('httpx.AsyncClient.post') as mock_post:
-            mock_response = MagicMock()
-            mock_response.status_code = 200
-            mock_response.json.return_value = {
-                "messages": [{"id": "msg_123"}]
-            }
-            mock_post.return_value = mock_response
-            
-            result = await meta_provider.send_text("+9876543210", "Hello!")
-            
-            assert result == "msg_123"
-            mock_post.assert_called_once()
+    async def test_is_available_success(self, http_provider, server):
+        """Test availability check success."""
+        provider, case = http_provider
+        requests = server.reply(OK)
+        
+        result = await provider.is_available()
+        
+        assert result is True
+        assert case["authorized"](requests[0])
     
     @pytest.mark.asyncio
-    async def test_send_text_failure(self, meta_provider):
-        """Test failed message sending."""
-        with patch('httpx.AsyncClient.post') as mock_post:
-            mock_response = MagicMock()
-            mock_response.status_code = 400
-            mock_response.text = "Bad Request"
-            mock_post.return_value = mock_response
-            
-            result = await meta_provider.send_text("+9876543210", "Hello!")
-            
-            assert result is None
+    async def test_is_available_failure(self, http_provider, server):
+        """Test availability check failure."""
+        provider, _ = http_provider
+        server.reply(NOT_FOUND)
+        
+        result = await provider.is_available()
+        
+        assert result is False
     
     @pytest.mark.asyncio
-    async def test_is_available_success(self, meta_provider):
-        """Test availability check success."""
-        with patch('httpx.AsyncClient.get') as mock_get:
-            mock_response = MagicMock()
-            mock_response.status_code = 200
-            mock_get.return_value = mock_response
-            
-            result = await meta_provider.is_available()
-            
-            assert result is True
-    
-    def test_get_provider_name(self, meta_provider):
-        """Test provider name."""
-        assert meta_provider.get_provider_name() == "meta"
+    async def test_client_reused_and_closed(self, http_provider, server):
+        """Test that one pooled client serves every call and closes on exit."""
+        provider, _ = http_provider
+        requests = server.reply(OK)
+        client = provider._client
+        
+        async with provider:
+            await provider.is_available()
+            await provider.is_available()
+        
+        assert len(requests) == 2
+        assert provider._client is client
+        assert client.is_closed
 
 
 class TestHuggingFaceLLM:
     """Test Hugging Face LLM provider."""
     
     @pytest.fixture
-    def hf_provider(self):
+    async def hf_provider(self, server):
         """Create Hugging Face provider."""
-        return HuggingFaceLLM(
+        provider = HuggingFaceLLM(
             api_key="test_key",
-            model_id="test/model"
+            model_id="test/model",
+            transport=server.transport
         )
+        yield provider
+        await provider.close()
     
     @pytest.mark.asyncio
-    async def test_generate_text_success(self, hf_provider):
+    async def test_generate_text_success(self, hf_provider, server):
         """Test successful text generation."""
-        with patch('httpx.AsyncClient.post') as mock_post:
-            mock_response = MagicMock()
-            mock_response.status_code = 200
-            mock_response.json.return_value = [
-                {"generated_text": "Hello! How are you today?"}
-            ]
-            mock_post.return_value = mock_response
-            
-            result = await hf_provider.generate_text(
-                "You are a helpful assistant.",
-                "Generate a greeting."
-            )
-            
-            assert result == "Hello! How are you today?"
-            mock_post.assert_called_once()
+        requests = server.reply(HF_GREETING)
+        
+        result = await hf_provider.generate_text(
+            "You are a helpful assistant.",
+            "Generate a greeting."
+        )
+        
+        assert result == "Hello! How are you today?"
+        assert len(requests) == 1
+        assert requests[0].headers["Authorization"] == "Bearer test_key"
     
     @pytest.mark.asyncio
-    async def test_generate_text_model_loading(self, hf_provider):
+    async def test_generate_text_model_loading(self, hf_provider, server):
         """Test text generation when model is loading."""
-        with patch('httpx.AsyncClient.post') as mock_post:
-            # First call returns 503 (model loading)
-            mock_response1 = MagicMock()
-            mock_response1.status_code = 503
-            
-            # Second call returns success
-            mock_response2 = MagicMock()
-            mock_response2.status_code = 200
-            mock_response2.json.return_value = [
-                {"generated_text": "Hello!"}
-            ]
-            
-            mock_post.side_effect = [mock_response1, mock_response2]
-            
-            with patch('asyncio.sleep') as mock_sleep:
-                result = await hf_provider.generate_text(
-                    "You are a helpful assistant.",
-                    "Generate a greeting."
-                )
-                
-                assert result == "Hello!"
-                assert mock_post.call_count == 2
-                mock_sleep.assert_called_once()
-    
-    @pytest.mark.asyncio
-    async def test_generate_text_failure(self, hf_provider):
-        """Test failed text generation."""
-        with patch('httpx.AsyncClient.post') as mock_post:
-            mock_response = MagicMock()
-            mock_response.status_code = 400
-            mock_response.text = "Bad Request"
-            mock_post.return_value = mock_response
-            
+        # First call returns 503 (model loading), second call succeeds
+        requests = server.reply(MODEL_LOADING, HF_HELLO)
+        
+        with patch('asyncio.sleep') as mock_sleep:
             result = await hf_provider.generate_text(
                 "You are a helpful assistant.",
                 "Generate a greeting."
             )
             
-            assert result is None
+            assert result == "Hello!"
+            assert len(requests) == 2
+            mock_sleep.assert_called_once()
     
     @pytest.mark.asyncio
-    async def test_generate_text_timeout(self, hf_provider):
+    async def test_generate_text_failure(self, hf_provider, server):
+        """Test failed text generation."""
+        server.reply(BAD_REQUEST)
+        
+        result = await hf_provider.generate_text(
+            "You are a helpful assistant.",
+            "Generate a greeting."
+        )
+        
+        assert result is None
+    
+    @pytest.mark.asyncio
+    async def test_generate_text_timeout(self, hf_provider, server):
         """Test text generation timeout."""
-        with patch('httpx.AsyncClient.post') as mock_post:
-            mock_post.side_effect = Exception("Timeout")
-            
-            result = await hf_provider.generate_text(
-                "You are a helpful assistant.",
-                "Generate a greeting."
-            )
-            
-            assert result is None
+        server.reply(httpx.ReadTimeout("Timeout"))
+        
+        result = await hf_provider.generate_text(
+            "You are a helpful assistant.",
+            "Generate a greeting."
+        )
+        
+        assert result is None
     
     def test_extract_generated_text_standard_format(self, hf_provider):
         """Test extracting text from standard response format."""
@@ -253,30 +304,29 @@ class TestHuggingFaceLLM:
         response = []
         result = hf_provider._extract_generated_text(response)
         assert result is None
+
+
+class TestUltramsgWhatsApp:
+    """Test Ultramsg WhatsApp provider."""
     
-    @pytest.mark.asyncio
-    async def test_is_available_success(self, hf_provider):
-        """Test availability check success."""
-        with patch('httpx.AsyncClient.get') as mock_get:
-            mock_response = MagicMock()
-            mock_response.status_code = 200
-            mock_get.return_value = mock_response
-            
-            result = await hf_provider.is_available()
-            
-            assert result is True
-    
-    @pytest.mark.asyncio
-    async def test_is_available_failure(self, hf_provider):
-        """Test availability check failure."""
-        with patch('httpx.AsyncClient.get') as mock_get:
-            mock_response = MagicMock()
-            mock_response.status_code = 404
-            mock_get.return_value = mock_response
-            
-            result = await hf_provider.is_available()
-            
-            assert result is False
+    def test_send_text_across_event_loops(self, server):
+        """Test that one provider keeps working when each call runs on a new event loop."""
+        provider = UltramsgWhatsApp(api_key="test_key", instance_id="instance1", transport=server.transport)
+        requests = server.reply(Reply(200, json={"id": "msg_123"}))
+        clients = []
+        
+        async def send() -> Optional[str]:
+            clients.append(provider._client.client)
+            return await provider.send_text("+9876543210", "Hello!")
+        
+        # The CLI runs every action through its own asyncio.run
+        assert asyncio.run(send()) == "msg_123"
+        assert asyncio.run(send()) == "msg_123"
+        
+        assert len(requests) == 2
+        assert requests[0].url.path == "/instance1/messages/chat"
+        # Connections opened on the first loop are never reused on the second
+        assert clients[0] is not clients[1]
 
 
 class TestMessengerInterface:
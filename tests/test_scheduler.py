@@ -7,60 +7,77 @@ from unittest.mock import AsyncMock, MagicMock, patch
 from utils import MessageScheduler
 
 
+@pytest.fixture(scope="module")
+def mock_config():
+    """Create mock configuration."""
+    with patch('utils.config') as mock_config:
+        mock_config.settings.enabled = True
+        mock_config.settings.whatsapp_provider = "twilio"
+        mock_config.settings.twilio_account_sid = "test_sid"
+        mock_config.settings.twilio_auth_token = "test_token"
+        mock_config.settings.twilio_whatsapp_from = "whatsapp:+1234567890"
+        mock_config.settings.gf_whatsapp_number = "+9876543210"
+        mock_config.settings.timezone = "UTC"
+        mock_config.settings.get_skip_dates_list.return_value = []
+        yield mock_config
+
+
+@pytest.fixture(scope="module")
+def mock_messenger():
+    """Create mock messenger."""
+    messenger = MagicMock()
+    messenger.send_text = AsyncMock()
+    messenger.is_available = AsyncMock(return_value=True)
+    messenger.get_provider_name.return_value = "twilio"
+    return messenger
+
+
+@pytest.fixture(scope="module")
+def mock_composer():
+    """Create mock composer."""
+    composer = MagicMock()
+    composer.compose_message = AsyncMock()
+    composer.set_storage = MagicMock()
+    return composer
+
+
+@pytest.fixture(scope="module")
+def mock_storage():
+    """Create mock storage."""
+    storage = MagicMock()
+    storage.is_message_sent.return_value = False
+    storage.record_message_sent = MagicMock()
+    return storage
+
+
+@pytest.fixture(scope="module")
+def scheduler(mock_config, mock_messenger, mock_composer, mock_storage):
+    """Create scheduler with mocks."""
+    with patch('providers.TwilioWhatsApp', return_value=mock_messenger), \
+         patch('utils.create_message_composer', return_value=mock_composer), \
+         patch('utils.Storage', return_value=mock_storage):
+
+        scheduler = MessageScheduler()
+        scheduler.messenger = mock_messenger
+        scheduler.composer = mock_composer
+        scheduler.storage = mock_storage
+        return scheduler
+
+
 class TestMessageScheduler:
-    """Test scheduler functionality."""
+    """Test scheduler functionality.
     
-    @pytest.fixture
-    def mock_config(self):
-        """Create mock configuration."""
-        with patch('utils.config') as mock_config:
-            mock_config.settings.enabled = True
-            mock_config.settings.whatsapp_provider = "twilio"
-            mock_config.settings.twilio_account_sid = "test_sid"
-            mock_config.settings.twilio_auth_token = "test_token"
-            mock_config.settings.twilio_whatsapp_from = "whatsapp:+1234567890"
-            mock_config.settings.gf_whatsapp_number = "+9876543210"
-            mock_config.settings.timezone = "UTC"
-            mock_config.settings.get_skip_dates_list.return_value = []
-            yield mock_config
+    The scheduler and its mocks are built once per module; reset_mocks
+    clears call history and per-test overrides after every test.
+    """
     
-    @pytest.fixture
-    def mock_messenger(self):
-        """Create mock messenger."""
-        messenger = MagicMock()
-        messenger.send_text = AsyncMock()
-        messenger.is_available = AsyncMock(return_value=True)
-        messenger.get_provider_name.return_value = "twilio"
-        return messenger
-    
-    @pytest.fixture
-    def mock_composer(self):
-        """Create mock composer."""
-        composer = MagicMock()
-        composer.compose_message = AsyncMock()
-        composer.set_storage = MagicMock()
-        return composer
-    
-    @pytest.fixture
-    def mock_storage(self):
-        """Create mock storage."""
-        storage = MagicMock()
-        storage.is_message_sent.return_value = False
-        storage.record_message_sent = MagicMock()
-        return storage
-    
-    @pytest.fixture
-    def scheduler(self, mock_config, mock_messenger, mock_composer, mock_storage):
-        """Create scheduler with mocks."""
-        with patch('providers.TwilioWhatsApp', return_value=mock_messenger), \
-             patch('utils.create_message_composer', return_value=mock_composer), \
-             patch('utils.Storage', return_value=mock_storage):
-            
-            scheduler = MessageScheduler()
-            scheduler.messenger = mock_messenger
-            scheduler.composer = mock_composer
-            scheduler.storage = mock_storage
-            return scheduler
+    @pytest.fixture(autouse=True)
+    def reset_mocks(self, mock_messenger, mock_composer, mock_storage):
+        """Give every test fresh call counts and default return values."""
+        yield
+        for mock in (mock_messenger, mock_composer, mock_storage):
+            mock.reset_mock()
+        mock_storage.is_message_sent.return_value = False
     
     def test_message_windows(self, scheduler):
         """Test message window definitions."""
@@ -95,7 +112,20 @@ class TestMessageScheduler:
         for message_type in times1:
             if times1[message_type] is not None and times2[message_type] is not None:
                 assert times1[message_type] == times2[message_type]
-    
+
+    def test_generate_daily_times_within_windows(self, scheduler):
+        """Test that generated times stay within their window plus jitter."""
+        test_date = date(2024, 1, 1)
+        times = scheduler._generate_daily_times(test_date)
+
+        for message_type, dt in times.items():
+            if dt is None:
+                continue
+            start_time, end_time = scheduler.message_windows[message_type]
+            minutes = dt.hour * 60 + dt.minute
+            assert start_time.hour * 60 + start_time.minute - 20 <= minutes
+            assert minutes <= end_time.hour * 60 + end_time.minute + 20
+
     @pytest.mark.asyncio
     async def test_send_message_already_sent(self, scheduler, mock_storage):
         """Test sending message when already sent."""
@@ -8,15 +8,20 @@ from unittest.mock import Mock, patch
 
 from recommenders.hf_bollywood import (
     BollywoodSongRecommender,
+    load_embeddings,
     load_song_catalog,
-    create_recommender
+    create_recommender,
+    save_embeddings_fp16
 )
 from utils.types import MessageType, SongRecommendation
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_catalog():
-    """Create a sample song catalog for testing."""
+    """Create a sample song catalog for testing, once per session.
+    
+    Shared by every test; tests must not modify it.
+    """
     return pd.DataFrame({
         'song_id': ['B001', 'B002', 'B003'],
         'title': ['Tum Hi Ho', 'Pehla Nasha', 'Tere Sang Yaara'],
@@ -32,10 +37,19 @@ def sample_catalog():
     })
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_embeddings():
-    """Create sample embeddings for testing."""
-    return np.random.rand(3, 384).astype('float32')  # 384 is typical for all-MiniLM-L6-v2
+    """Create sample embeddings for testing, once per session."""
+    emb = np.random.rand(3, 384).astype('float32')  # 384 is typical for all-MiniLM-L6-v2
+    # Shared across tests, so fail loudly on any in-place write
+    emb.flags.writeable = False
+    return emb
+
+
+@pytest.fixture(scope="session")
+def recommender(sample_catalog, sample_embeddings):
+    """Build one recommender for the read-only filtering and picking tests."""
+    return BollywoodSongRecommender(sample_catalog, sample_embeddings)
 
 
 def test_load_song_catalog(tmp_path):
@@ -64,6 +78,49 @@ def test_load_song_catalog(tmp_path):
     assert df.iloc[0]['title'] == 'Test Song'
 
 
+def test_fp16_embeddings_search(tmp_path, sample_catalog):
+    """Test that float16 embeddings round-trip and rank like float32."""
+    embeddings = np.eye(3, 384, dtype='float32')
+    embeddings_path = tmp_path / "test_embeddings.npy"
+    
+    save_embeddings_fp16(str(embeddings_path), embeddings)
+    emb = load_embeddings(str(embeddings_path))
+    assert emb.dtype == np.float16
+    
+    recommender = BollywoodSongRecommender(sample_catalog, emb)
+    with patch('recommenders.hf_bollywood.FAISS_AVAILABLE', False):
+        candidates = recommender.search_candidates(embeddings[1], top_k=3)
+    
+    assert candidates[0]['song_id'] == 'B002'
+
+
+def test_fp16_embeddings_normalized(tmp_path):
+    """Test that saved float16 embeddings are L2-normalized."""
+    embeddings = np.array([[3.0, 4.0], [0.0, 2.0], [0.0, 0.0]], dtype='float32')
+    embeddings_path = tmp_path / "test_embeddings.npy"
+    
+    save_embeddings_fp16(str(embeddings_path), embeddings)
+    emb = load_embeddings(str(embeddings_path))
+    
+    norms = np.linalg.norm(emb.astype(np.float32), axis=1)
+    assert np.allclose(norms[:2], 1.0, atol=1e-3)
+    assert norms[2] == 0.0
+
+
+@patch('recommenders.hf_bollywood.FAISS_AVAILABLE', False)
+def test_search_candidates_batch(sample_catalog):
+    """Test that a batch search ranks each query like a single search."""
+    embeddings = np.eye(3, 384, dtype='float32')
+    recommender = BollywoodSongRecommender(sample_catalog, embeddings)
+    
+    results = recommender.search_candidates_batch(embeddings[[2, 0]], top_k=2)
+    
+    assert len(results) == 2
+    assert [c['song_id'] for c in results[0]][0] == 'B003'
+    assert [c['song_id'] for c in results[1]][0] == 'B001'
+    assert results[1] == recommender.search_candidates(embeddings[0], top_k=2)
+
+
 @patch('recommenders.hf_bollywood.SENTENCE_TRANSFORMERS_AVAILABLE', False)
 def test_recommender_without_sentence_transformers(sample_catalog):
     """Test recommender behavior when sentence-transformers is not available."""
@@ -96,10 +153,82 @@ def test_recommender_initialization(mock_cross_encoder, mock_sentence_transforme
     assert recommender.ce is not None
 
 
-def test_filter_candidates(sample_catalog, sample_embeddings):
+@patch('recommenders.hf_bollywood.SENTENCE_TRANSFORMERS_AVAILABLE', False)
+def test_rerank_texts_with_sparse_catalog():
+    """Test that missing or non-string text columns don't break construction."""
+    catalog = pd.DataFrame({
+        'song_id': ['B001', 'B002'],
+        'title': ['Tum Hi Ho', 1942],
+        'moods': ['romantic', None]
+    })
+
+    recommender = BollywoodSongRecommender(catalog)
+
+    assert recommender.rerank_texts == {'B001': 'Tum Hi Ho  romantic', 'B002': '1942  '}
+
+
+class StubPairTokenizer:
+    """Word-level stand-in for a cross-encoder tokenizer ([CLS] a [SEP] b [SEP])."""
+
+    def __init__(self):
+        self.calls = []
+        self.pairs = []
+
+    def __call__(self, text, add_special_tokens=True):
+        self.calls.append(text)
+        to_ids = lambda t: [len(word) for word in t.split()]
+        if isinstance(text, list):
+            return {'input_ids': [to_ids(t) for t in text]}
+        return {'input_ids': to_ids(text)}
+
+    def num_special_tokens_to_add(self, pair=False):
+        return 3 if pair else 2
+
+    def prepare_for_model(self, ids, pair_ids, add_special_tokens=True):
+        input_ids = [101] + list(ids) + [102] + list(pair_ids) + [102]
+        self.pairs.append(input_ids)
+        return {'input_ids': input_ids, 'attention_mask': [1] * len(input_ids)}
+
+    def pad(self, features, padding=True, return_tensors="pt"):
+        import torch
+        width = max(len(f['input_ids']) for f in features)
+        return {
+            key: torch.tensor([f[key] + [0] * (width - len(f[key])) for f in features])
+            for key in ('input_ids', 'attention_mask')
+        }
+
+
+@patch('recommenders.hf_bollywood.SENTENCE_TRANSFORMERS_AVAILABLE', False)
+def test_rerank_with_cross_encoder(sample_catalog):
+    """Test reranking with a stub cross-encoder tokenizer and model."""
+    torch = pytest.importorskip("torch")
+
+    recommender = BollywoodSongRecommender(sample_catalog)
+    ce = Mock()
+    ce.max_length = 16
+    ce.tokenizer = StubPairTokenizer()
+    ce.model.device = torch.device('cpu')
+    ce.model.return_value.logits = torch.tensor([[0.1], [0.9], [0.5]])
+    recommender.ce = ce
+
+    candidates = [sample_catalog.iloc[i].to_dict() for i in range(3)]
+    query = 'romantic ' * 50
+
+    with patch('recommenders.hf_bollywood.torch', torch, create=True):
+        reranked = recommender.rerank_with_cross_encoder(query, candidates, top_k=3)
+
+    assert [c['song_id'] for c in reranked] == ['B002', 'B003', 'B001']
+    # The query is tokenized once and the candidates in one batch call
+    texts = [recommender.rerank_texts[c['song_id']] for c in candidates]
+    assert ce.tokenizer.calls == [query, texts]
+    # An overlong query is truncated so every pair still fits max_length
+    assert len(ce.tokenizer.pairs) == 3
+    assert all(len(ids) <= 16 for ids in ce.tokenizer.pairs)
+    assert all(ids[1:3] == [8, 8] for ids in ce.tokenizer.pairs)
+
+
+def test_filter_candidates(recommender):
     """Test candidate filtering."""
-    recommender = BollywoodSongRecommender(sample_catalog, sample_embeddings)
-    
     candidates = [
         {'title': 'Good Song', 'is_explicit': False, 'duration_sec': 300, 'url': 'https://example.com', 'language': 'Hindi', 'views': 1000000},
         {'title': 'Bad Song', 'is_explicit': True, 'duration_sec': 300, 'url': 'https://example.com', 'language': 'Hindi', 'views': 1000000},
@@ -118,12 +247,35 @@ def test_filter_candidates(sample_catalog, sample_embeddings):
     # Should filter out explicit, short, and no-URL songs
     assert len(filtered) == 1
     assert filtered[0]['title'] == 'Good Song'
+    # Dicts come back as-is, not copies
+    assert filtered[0] is candidates[0]
+
+    # A DataFrame goes through the same masks
+    filtered = recommender.filter_candidates(pd.DataFrame(candidates), preferences)
+    assert [song['title'] for song in filtered] == ['Good Song']
+
+
+def test_filter_candidates_ordering(recommender):
+    """Test that survivors are ordered by language priority, then views."""
+    candidates = pd.DataFrame([
+        {'title': 'English Hit', 'duration_sec': 200, 'url': 'https://example.com/1', 'language': 'English', 'views': 900},
+        {'title': 'Hindi Small', 'duration_sec': 200, 'url': 'https://example.com/2', 'language': 'Hindi', 'views': 10},
+        {'title': 'Punjabi Song', 'duration_sec': 200, 'url': 'https://example.com/3', 'language': 'Punjabi', 'views': 5000},
+        {'title': 'Hindi Big', 'duration_sec': 200, 'url': 'https://example.com/4', 'language': 'Hindi', 'views': 100},
+        {'title': 'Long Hindi', 'duration_sec': 600, 'url': 'https://example.com/5', 'language': 'Hindi', 'views': 10 ** 6}
+    ])
 
+    preferences = {'language_priority': ['Hindi', 'Punjabi'], 'blacklist': []}
 
-def test_pick_one(sample_catalog, sample_embeddings):
+    filtered = recommender.filter_candidates(candidates, preferences)
+
+    assert [song['title'] for song in filtered] == [
+        'Hindi Big', 'Hindi Small', 'Punjabi Song', 'English Hit'
+    ]
+
+
+def test_pick_one(recommender):
     """Test song selection avoiding recent picks."""
-    recommender = BollywoodSongRecommender(sample_catalog, sample_embeddings)
-    
     candidates = [
         {'song_id': 'B001', 'title': 'Song 1', 'url': 'https://example.com/1'},
         {'song_id': 'B002', 'title': 'Song 2', 'url': 'https://example.com/2'},
@@ -139,6 +291,20 @@ def test_pick_one(sample_catalog, sample_embeddings):
     assert result['title'] == 'Song 3'
 
 
+def test_pick_one_all_recent(recommender):
+    """Test that the top candidate is returned when all are recent."""
+    candidates = [
+        {'song_id': 'B001', 'title': 'Song 1', 'url': 'https://example.com/1'},
+        {'song_id': 'B002', 'title': 'Song 2', 'url': 'https://example.com/2'}
+    ]
+    
+    result = recommender.pick_one(candidates, frozenset({'B001', 'B002'}))
+    
+    assert result is not None
+    assert result['song_id'] == 'B001'
+    assert recommender.pick_one([], frozenset()) is None
+
+
 @patch('recommenders.hf_bollywood.SENTENCE_TRANSFORMERS_AVAILABLE', True)
 @patch('recommenders.hf_bollywood.SentenceTransformer')
 @patch('recommenders.hf_bollywood.CrossEncoder')
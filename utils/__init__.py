@@ -4,6 +4,7 @@ Utility modules for Bubu Agent.
 
 from .utils import (
     setup_logging,
+    run_async,
     get_logger,
     mask_phone_number,
     scrub_secrets_from_logs,
@@ -25,6 +26,7 @@ from .scheduler import MessageScheduler
 __all__ = [
     # Utils
     "setup_logging",
+    "run_async",
     "get_logger", 
     "mask_phone_number",
     "scrub_secrets_from_logs",
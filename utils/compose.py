@@ -124,9 +124,8 @@ class MessageComposer:
                 "closer": closer
             }
             
-            for key, value in replacements.items():
-                system_prompt = system_prompt.replace(f"{{{key}}}", value)
-                user_prompt = user_prompt.replace(f"{{{key}}}", value)
+            system_prompt = config.get_compiled_prompt_template(message_type, "system").safe_substitute(replacements)
+            user_prompt = config.get_compiled_prompt_template(message_type, "user").safe_substitute(replacements)
             
             # Add Bollywood and cheesy inspiration to prompts
             if bollywood_quote:
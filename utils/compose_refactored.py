@@ -5,6 +5,9 @@ from __future__ import annotations
 import asyncio
 import functools
 import json
+import random
+import re
+import unicodedata
 from datetime import date
 from typing import Any, Dict, List, Optional
 
@@ -29,6 +32,73 @@ except ImportError:
 
 logger = get_logger(__name__)
 
+_ELLIPSIS = "..."
+_ZWJ = "\u200d"
+
+
+def _is_cluster_continuation(char: str) -> bool:
+    """True for characters that attach to the preceding one (ZWJ, variation
+    selectors, skin-tone modifiers, combining marks)."""
+    return (
+        char == _ZWJ
+        or "\ufe00" <= char <= "\ufe0f"
+        or "\U0001f3fb" <= char <= "\U0001f3ff"
+        or unicodedata.combining(char) != 0
+    )
+
+
+def _cluster_safe_cut(text: str, end: int) -> int:
+    """Move a slice end back so it doesn't split a grapheme cluster."""
+    while 0 < end < len(text) and (
+        _is_cluster_continuation(text[end]) or text[end - 1] == _ZWJ
+    ):
+        end -= 1
+    return end
+
+
+@functools.lru_cache(maxsize=16)
+def _closer_pattern(closer: str) -> re.Pattern:
+    """Compiled pattern matching a run of closers with their surrounding spaces.
+
+    There are only a handful of configured closers, so each is compiled once.
+    """
+    escaped = re.escape(closer)
+    return re.compile(rf" ?{escaped}(?: ?{escaped})* ?")
+
+
+def _closer_gap(match: re.Match) -> str:
+    """Leave one space where a removed closer was separated from its neighbours."""
+    removed = match.group(0)
+    return " " if removed[0] == " " or removed[-1] == " " else ""
+
+
+# Stand-in for {closer} while a template is pre-filled
+_CLOSER_SLOT = "\x00closer\x00"
+
+
+def _prefill_template(template: str, **fields: str) -> tuple[str, ...]:
+    """Fill a template's fixed fields once and split it around its closer slots.
+
+    Rendering is then just ``closer.join(parts)``. Raises like str.format_map
+    when the template can't be formatted.
+    """
+    return tuple(template.format_map({**fields, "closer": _CLOSER_SLOT}).split(_CLOSER_SLOT))
+
+
+def _split_fallback_template(template: str, gf_name: str) -> Optional[tuple[str, ...]]:
+    """Pre-fill a fallback template; None if it can't be formatted (unknown keys, stray braces)."""
+    try:
+        return _prefill_template(template, GF_NAME=gf_name)
+    except (KeyError, IndexError, ValueError):
+        return None
+
+
+@functools.lru_cache(maxsize=128)
+def _date_seed_state(date_obj: date) -> tuple[int, tuple]:
+    """Seed and initial generator state for a date, computed once per date."""
+    seed = get_date_seed(date_obj)
+    return seed, random.Random(seed).getstate()
+
 
 class MessageComposer:
     """Handles message composition and text generation with proper typing and error handling."""
@@ -50,6 +120,34 @@ class MessageComposer:
         self.config = config
         self.storage = storage
         
+        # Fallback templates and closers don't change at runtime; read them once
+        self._fallback_by_type: Dict[MessageType, tuple[str, ...]] = {
+            message_type: tuple(self.get_fallback_templates(message_type))
+            for message_type in MessageType
+        }
+        self._signature_closers: tuple[str, ...] = tuple(config.get_signature_closers() or ())
+        # Templates pre-filled with the name and split around the closer
+        self._fallback_parts: Dict[MessageType, tuple[Optional[tuple[str, ...]], ...]] = {
+            message_type: tuple(_split_fallback_template(template, config.gf_name) for template in templates)
+            for message_type, templates in self._fallback_by_type.items()
+        }
+        # Prompt templates likewise, with GF_NAME and the tone filled in. A
+        # template that fails to format keeps its exception, raised on use.
+        self._prompt_parts: Dict[tuple[MessageType, str], tuple[str, ...] | Exception] = {}
+        for message_type in MessageType:
+            for role in ("system", "user"):
+                template = config.get_prompt_template(message_type, role)
+                if not template:
+                    continue
+                try:
+                    self._prompt_parts[(message_type, role)] = _prefill_template(
+                        template,
+                        GF_NAME=config.gf_name,
+                        DAILY_FLIRTY_TONE=config.daily_flirty_tone
+                    )
+                except Exception as e:
+                    self._prompt_parts[(message_type, role)] = e
+        
         # Initialize song recommender if available
         self.song_recommender = None
         if SONG_RECOMMENDER_AVAILABLE:
@@ -90,7 +188,9 @@ class MessageComposer:
         self,
         message_type: MessageType,
         date_obj: date,
-        force_fallback: bool = False
+        force_fallback: bool = False,
+        *,
+        _pregenerated: Optional[GenerationResult] = None
     ) -> MessageResult:
         """Compose a message for the given type and date.
         
@@ -98,6 +198,7 @@ class MessageComposer:
             message_type: Type of message to compose
             date_obj: Date for the message
             force_fallback: Force use of fallback templates
+            _pregenerated: AI result from compose_all_messages' batched call
             
         Returns:
             MessageResult containing the composed message and status
@@ -128,7 +229,9 @@ class MessageComposer:
                 )
             
             # Try AI generation first
-            generation_result = await self._generate_ai_message(message_type, closer, date_obj)
+            generation_result = _pregenerated
+            if generation_result is None:
+                generation_result = await self._generate_ai_message(message_type, closer, date_obj)
             
             if generation_result.reason == LLMResult.OK and generation_result.text:
                 # Validate and clean the message
@@ -202,46 +305,10 @@ class MessageComposer:
             GenerationResult containing the generated text and status
         """
         try:
-            # Get prompt templates
-            system_prompt = self.config.get_prompt_template(message_type, "system")
-            user_prompt = self.config.get_prompt_template(message_type, "user")
-            
-            if not system_prompt or not user_prompt:
-                return GenerationResult(
-                    text=None,
-                    reason=LLMResult.MISSING_PROMPTS,
-                    details={"message_type": message_type.value}
-                )
-            
-            # Get Bollywood quote and cheesy line for inspiration
-            bollywood_quote = self._get_bollywood_quote(date_obj)
-            cheesy_line = self._get_cheesy_line(date_obj)
-            
-            # Replace placeholders safely
-            replacements = {
-                "GF_NAME": self.config.gf_name,
-                "DAILY_FLIRTY_TONE": self.config.daily_flirty_tone,
-                "closer": closer
-            }
-            
-            try:
-                system_prompt = system_prompt.format_map(replacements)
-                user_prompt = user_prompt.format_map(replacements)
-            except KeyError as e:
-                return GenerationResult(
-                    text=None,
-                    reason=LLMResult.MISSING_PROMPTS,
-                    details={"missing_key": str(e)}
-                )
-            
-            # Add Bollywood and cheesy inspiration to prompts
-            if bollywood_quote:
-                system_prompt += f"\n\nBollywood inspiration: '{bollywood_quote}'"
-                user_prompt += f"\n\nFeel free to use the romantic style of this Bollywood quote as inspiration."
-            
-            if cheesy_line:
-                system_prompt += f"\n\nCheesy line example: '{cheesy_line}'"
-                user_prompt += f"\n\nYou can include cheesy romantic elements like this example for fun."
+            prompts = self._build_prompts(message_type, closer, date_obj)
+            if isinstance(prompts, GenerationResult):
+                return prompts
+            system_prompt, user_prompt = prompts
             
             # Get generation parameters
             max_tokens = self.config.get_hf_setting("max_new_tokens", 150)
@@ -259,7 +326,8 @@ class MessageComposer:
                         max_new_tokens=max_tokens,
                         temperature=temperature,
                         top_p=top_p,
-                        do_sample=do_sample
+                        do_sample=do_sample,
+                        message_type=message_type
                     ),
                     timeout=timeout
                 )
@@ -270,21 +338,7 @@ class MessageComposer:
                     details={"timeout_seconds": timeout}
                 )
             
-            if not generated_text:
-                return GenerationResult(
-                    text=None,
-                    reason=LLMResult.EMPTY,
-                    details={"message_type": message_type.value}
-                )
-            
-            # Clean and format the message
-            message = self._clean_generated_text(generated_text, closer)
-            
-            return GenerationResult(
-                text=message,
-                reason=LLMResult.OK,
-                details={"message_type": message_type.value}
-            )
+            return self._to_generation_result(generated_text, message_type, closer)
             
         except Exception as e:
             logger.exception(
@@ -297,6 +351,168 @@ class MessageComposer:
                 details={"error": str(e)}
             )
     
+    def _build_prompts(
+        self,
+        message_type: MessageType,
+        closer: str,
+        date_obj: date
+    ) -> tuple[str, str] | GenerationResult:
+        """Build the system and user prompts for a message.
+        
+        Args:
+            message_type: Type of message to generate
+            closer: Signature closer to append
+            date_obj: Date for the message
+            
+        Returns:
+            (system_prompt, user_prompt), or a GenerationResult if the
+            templates are missing or malformed
+        """
+        # Get pre-filled prompt templates
+        system_parts = self._prompt_parts.get((message_type, "system"))
+        user_parts = self._prompt_parts.get((message_type, "user"))
+        
+        if system_parts is None or user_parts is None:
+            return GenerationResult(
+                text=None,
+                reason=LLMResult.MISSING_PROMPTS,
+                details={"message_type": message_type.value}
+            )
+        
+        for parts in (system_parts, user_parts):
+            if isinstance(parts, KeyError):
+                return GenerationResult(
+                    text=None,
+                    reason=LLMResult.MISSING_PROMPTS,
+                    details={"missing_key": str(parts)}
+                )
+            if isinstance(parts, Exception):
+                raise parts
+        
+        # Only the closer varies per call
+        system_prompt = closer.join(system_parts)
+        user_prompt = closer.join(user_parts)
+        
+        # Get Bollywood quote and cheesy line for inspiration
+        bollywood_quote = self._get_bollywood_quote(date_obj)
+        cheesy_line = self._get_cheesy_line(date_obj)
+        
+        # Add Bollywood and cheesy inspiration to prompts
+        if bollywood_quote:
+            system_prompt += f"\n\nBollywood inspiration: '{bollywood_quote}'"
+            user_prompt += f"\n\nFeel free to use the romantic style of this Bollywood quote as inspiration."
+        
+        if cheesy_line:
+            system_prompt += f"\n\nCheesy line example: '{cheesy_line}'"
+            user_prompt += f"\n\nYou can include cheesy romantic elements like this example for fun."
+        
+        return system_prompt, user_prompt
+    
+    def _to_generation_result(
+        self,
+        generated_text: Optional[str],
+        message_type: MessageType,
+        closer: str
+    ) -> GenerationResult:
+        """Wrap raw LLM output in a GenerationResult, cleaning it if present."""
+        if not generated_text:
+            return GenerationResult(
+                text=None,
+                reason=LLMResult.EMPTY,
+                details={"message_type": message_type.value}
+            )
+        
+        # Clean and format the message
+        message = self._clean_generated_text(generated_text, closer)
+        
+        return GenerationResult(
+            text=message,
+            reason=LLMResult.OK,
+            details={"message_type": message_type.value}
+        )
+    
+    async def compose_all_messages(self, date_obj: date) -> Dict[MessageType, MessageResult]:
+        """Compose every message type for a day.
+        
+        When the LLM provides ``generate_batch`` the AI text for all unsent
+        types comes from a single batched call; each message is then
+        finished (trimmed, song added, fallback on failure) exactly as
+        compose_message does. Other LLMs are called once per type,
+        concurrently.
+        
+        Args:
+            date_obj: Date to compose messages for
+            
+        Returns:
+            MessageResult for each message type
+        """
+        pregenerated: Dict[MessageType, GenerationResult] = {}
+        if hasattr(self.llm, "generate_batch"):
+            pregenerated = await self._pregenerate_ai_messages(date_obj)
+        
+        message_types = list(MessageType)
+        results = await asyncio.gather(
+            *(
+                self.compose_message(
+                    message_type, date_obj, _pregenerated=pregenerated.get(message_type)
+                )
+                for message_type in message_types
+            )
+        )
+        return dict(zip(message_types, results))
+    
+    async def _pregenerate_ai_messages(self, date_obj: date) -> Dict[MessageType, GenerationResult]:
+        """Generate AI text for all unsent message types of a day in one LLM call."""
+        closer = self._get_signature_closer(date_obj)
+        
+        message_types = []
+        prompts = []
+        for message_type in MessageType:
+            if self.storage.is_message_sent(date_obj, message_type):
+                continue
+            try:
+                built = self._build_prompts(message_type, closer, date_obj)
+            except Exception:
+                built = None
+            # Missing or broken prompts are reported by the per-type path
+            if not isinstance(built, tuple):
+                continue
+            message_types.append(message_type)
+            prompts.append(built)
+        
+        if not prompts:
+            return {}
+        
+        timeout = self.config.get_hf_setting("timeout_seconds", 30)
+        try:
+            generated_texts = await asyncio.wait_for(
+                self.llm.generate_batch(
+                    prompts,
+                    max_new_tokens=self.config.get_hf_setting("max_new_tokens", 150),
+                    temperature=self.config.get_hf_setting("temperature", 0.8),
+                    top_p=self.config.get_hf_setting("top_p", 0.9),
+                    do_sample=self.config.get_hf_setting("do_sample", True)
+                ),
+                timeout=timeout
+            )
+            results = [
+                self._to_generation_result(text, message_type, closer)
+                for message_type, text in zip(message_types, generated_texts)
+            ]
+        except asyncio.TimeoutError:
+            results = [
+                GenerationResult(text=None, reason=LLMResult.TIMEOUT, details={"timeout_seconds": timeout})
+                for _ in message_types
+            ]
+        except Exception as e:
+            logger.exception("Error generating batched AI messages", date=date_obj.isoformat())
+            results = [
+                GenerationResult(text=None, reason=LLMResult.EXCEPTION, details={"error": str(e)})
+                for _ in message_types
+            ]
+        
+        return dict(zip(message_types, results))
+    
     def _get_fallback_message(
         self,
         message_type: MessageType,
@@ -313,7 +529,7 @@ class MessageComposer:
         Returns:
             Formatted fallback message
         """
-        templates = self.config.get_fallback_templates(message_type)
+        templates = self._fallback_parts[message_type]
         
         if not templates:
             # Emergency fallback
@@ -321,16 +537,7 @@ class MessageComposer:
         
         # Deterministic selection for tests: pick the first template
         rng = self._rng(date_obj)
-        template = templates[0]
-        
-        try:
-            message = template.format(
-                GF_NAME=self.config.gf_name,
-                closer=closer
-            )
-        except KeyError:
-            # Fallback if template has missing keys
-            message = f"Hello {self.config.gf_name}! {closer}"
+        message = self._render_fallback(templates[0], closer)
         
         # Occasionally add Bollywood quote or cheesy line (20% chance)
         if rng.random() < 0.2:
@@ -346,6 +553,13 @@ class MessageComposer:
         
         return message
     
+    def _render_fallback(self, parts: Optional[tuple[str, ...]], closer: str) -> str:
+        """Render a pre-split fallback template with the closer."""
+        if parts is None:
+            # Fallback if template has missing keys
+            return f"Hello {self.config.gf_name}! {closer}"
+        return closer.join(parts)
+    
     def _get_signature_closer(self, date_obj: date) -> str:
         """Get a signature closer for the date.
         
@@ -355,7 +569,7 @@ class MessageComposer:
         Returns:
             Selected signature closer
         """
-        closers = self.config.get_signature_closers()
+        closers = self._signature_closers
         
         if not closers:
             return "— bubu"
@@ -413,16 +627,13 @@ class MessageComposer:
         # Remove extra whitespace
         text = " ".join(text.split())
         
-        # Remove the closer if it's already in the text
+        # Remove the closer if it's already in the text; dropping the spaces
+        # around it in the same pass keeps the text single-spaced
         if closer in text:
-            text = text.replace(closer, "").strip()
-            # Normalize spaces again after removal to avoid double spaces
-            text = " ".join(text.split())
+            text = _closer_pattern(closer).sub(_closer_gap, text).strip()
         
         # Add the closer
-        text = f"{text} {closer}"
-        
-        return text.strip()
+        return f"{text} {closer}".strip()
     
     def _validate_and_trim(
         self,
@@ -443,25 +654,28 @@ class MessageComposer:
         # Normalize whitespace
         text = " ".join(text.split())
         
-        # Check emoji count and reduce if necessary
-        emoji_count = len(EMOJI_PATTERN.findall(text))
-        if emoji_count > max_emojis:
-            emojis = EMOJI_PATTERN.findall(text)
-            if len(emojis) > max_emojis:
-                # Remove excess emojis from the end
-                for emoji in emojis[max_emojis:]:
-                    text = text.replace(emoji, "", 1)
+        # Check emoji count and drop every emoji after the first max_emojis
+        # in a single regex pass
+        if len(EMOJI_PATTERN.findall(text)) > max_emojis:
+            seen = 0
+            
+            def _keep_first(match) -> str:
+                nonlocal seen
+                seen += 1
+                return match.group(0) if seen <= max_emojis else ""
+            
+            text = EMOJI_PATTERN.sub(_keep_first, text)
         
         # Trim to max length if necessary (ensure final length <= max_length)
         if len(text) > max_length:
-            suffix = "..."
-            if max_length <= len(suffix):
-                return suffix[:max_length]
-            truncated = text[: max_length - len(suffix)]
-            last_space = truncated.rfind(' ')
-            if last_space > (max_length - len(suffix)) * 0.8:
-                truncated = truncated[:last_space]
-            text = truncated + suffix
+            if max_length <= len(_ELLIPSIS):
+                return _ELLIPSIS[:max_length]
+            limit = max_length - len(_ELLIPSIS)
+            end = text.rfind(' ', 0, limit)
+            if end <= limit * 0.8:
+                # Never cut an emoji sequence or accented letter in half
+                end = _cluster_safe_cut(text, limit)
+            text = f"{text[:end]}{_ELLIPSIS}"
         
         return text.strip()
     
@@ -474,8 +688,8 @@ class MessageComposer:
         Returns:
             Seeded random number generator
         """
-        seed = get_date_seed(date_obj)
-        return SeededRandom(seed)
+        # Each call gets an independent generator; only the seeding is cached
+        return SeededRandom.from_state(*_date_seed_state(date_obj))
     
     @functools.lru_cache(maxsize=128)
     def _get_cached_prompt_template(
@@ -518,33 +732,19 @@ class MessageComposer:
                 rng = SeededRandom(seed)
                 
                 # Get fallback templates and pick one randomly
-                templates = self.config.get_fallback_templates(message_type)
+                templates = self._fallback_parts[message_type]
                 if templates:
                     template = rng.choice(templates)
-                    closer = rng.choice(self.config.get_signature_closers() or ["— bubu"])
-                    try:
-                        message = template.format(
-                            GF_NAME=self.config.gf_name,
-                            closer=closer
-                        )
-                        
-                        # Add song recommendation if available and enabled
-                        if self.song_recommender:
-                            song = self._pick_song_sync(message_type, {"date": date.today().isoformat()})
-                            if song:
-                                message = self._add_song_to_message(message, song, message_type)
-                        
-                        return message
-                    except KeyError:
-                        message = f"Hello {self.config.gf_name}! {closer}"
-                        
-                        # Add song recommendation if available and enabled
-                        if self.song_recommender:
-                            song = self._pick_song_sync(message_type, {"date": date.today().isoformat()})
-                            if song:
-                                message = self._add_song_to_message(message, song, message_type)
-                        
-                        return message
+                    closer = rng.choice(self._signature_closers or ("— bubu",))
+                    message = self._render_fallback(template, closer)
+                    
+                    # Add song recommendation if available and enabled
+                    if self.song_recommender:
+                        song = self._pick_song_sync(message_type, {"date": date.today().isoformat()})
+                        if song:
+                            message = self._add_song_to_message(message, song, message_type)
+                    
+                    return message
             
             # Default behavior - use fallback templates
             closer = self._get_signature_closer(date.today())
@@ -684,6 +884,78 @@ class MessageComposer:
             logger.error(f"Failed to pick song: {e}")
             return None
     
+    async def plan_daily_songs(self, date_obj: date) -> Dict[MessageType, SongRecommendation]:
+        """Pick songs for every message type of a day in one batched pass.
+        
+        The recommender encodes and searches all queries together. The picks
+        are saved through storage, so a restart or another composer on the
+        same database reuses them; types already planned are not re-planned.
+        
+        Args:
+            date_obj: Date to plan songs for
+            
+        Returns:
+            Planned songs keyed by message type
+        """
+        try:
+            song_enabled = self.config.get_song_recommendation_setting("song_reco_enabled", False)
+            if not song_enabled or not self.song_recommender:
+                return {}
+            
+            planned = {}
+            for message_type in MessageType:
+                song = self.storage.get_planned_song(date_obj, message_type)
+                if song:
+                    planned[message_type] = song
+            
+            unplanned = [message_type for message_type in MessageType if message_type not in planned]
+            if not unplanned:
+                return planned
+            
+            cache_days = self.config.get_song_recommendation_setting("song_cache_days", 30)
+            recent_ids = self.storage.get_recent_song_ids(cache_days)
+            
+            # One intent LLM call per type, all in flight at once
+            intents = await asyncio.gather(
+                *(self._generate_song_intent(message_type) for message_type in unplanned)
+            )
+            
+            message_types = []
+            queries = []
+            for message_type, intent in zip(unplanned, intents):
+                if intent:
+                    message_types.append(message_type)
+                    queries.append(self._build_song_query(message_type, intent))
+            
+            if not queries:
+                return planned
+            
+            song_dicts = self.song_recommender.recommend_songs_batch(
+                query_texts=queries,
+                preferences=self._get_song_preferences(),
+                recent_ids=recent_ids
+            )
+            
+            for message_type, song_dict in zip(message_types, song_dicts):
+                if song_dict:
+                    planned[message_type] = SongRecommendation(
+                        song_id=song_dict["song_id"],
+                        title=song_dict["title"],
+                        url=song_dict["url"]
+                    )
+                    self.storage.save_planned_song(date_obj, message_type, planned[message_type])
+            
+            logger.info(
+                "Planned daily songs",
+                date=date_obj.isoformat(),
+                count=len(planned)
+            )
+            return planned
+            
+        except Exception as e:
+            logger.error(f"Failed to plan daily songs: {e}")
+            return {}
+    
     async def _generate_song_intent(self, message_type: MessageType) -> Optional[Dict[str, Any]]:
         """Generate song intent using LLM."""
         try:
@@ -795,9 +1067,11 @@ Return JSON only:
             if not song_enabled or not self.song_recommender:
                 return message
             
-            # Pick a song
-            day_ctx = {"date": date_obj.isoformat()}
-            song = await self.pick_song(message_type, day_ctx)
+            # Use the song planned for this slot, otherwise pick one now
+            song = self.storage.get_planned_song(date_obj, message_type)
+            if song is None:
+                day_ctx = {"date": date_obj.isoformat()}
+                song = await self.pick_song(message_type, day_ctx)
             
             if song:
                 # Add song to message
@@ -1,8 +1,11 @@
 """Configuration management for Bubu Agent."""
 
 import os
+import re
+from functools import lru_cache
 from datetime import date
 from pathlib import Path
+from string import Template
 from typing import Any, Dict, List, Optional
 
 import yaml
@@ -92,6 +95,20 @@ class Settings(BaseSettings):
     )
 
 
+# Placeholders substituted into prompt templates at send time
+_PROMPT_PLACEHOLDER = re.compile(r"\{(GF_NAME|DAILY_FLIRTY_TONE|closer)\}")
+
+
+def compile_prompt_template(template: str) -> Template:
+    """Turn ``{GF_NAME}``-style placeholders into a ``string.Template``.
+    
+    Literal ``$`` is escaped and other braces are left untouched, so
+    ``safe_substitute`` matches the old chained ``str.replace`` behaviour in a
+    single pass.
+    """
+    return Template(_PROMPT_PLACEHOLDER.sub(r"${\1}", template.replace("$", "$$")))
+
+
 class ConfigManager:
     """Manages application configuration from YAML and environment."""
     
@@ -125,8 +142,9 @@ class ConfigManager:
         
         return value
     
+    @lru_cache(maxsize=8)
     def get_fallback_templates(self, message_type: str) -> List[str]:
-        """Get fallback templates for a message type."""
+        """Get fallback templates for a message type (cached; treat as read-only)."""
         templates = self.get(f'fallback_templates.{message_type}', [])
         return templates if isinstance(templates, list) else []
     
@@ -135,10 +153,16 @@ class ConfigManager:
         closers = self.get('signature_closers', [])
         return closers if isinstance(closers, list) else []
     
+    @lru_cache(maxsize=32)
     def get_prompt_template(self, message_type: str, template_type: str) -> str:
-        """Get prompt template for a message type."""
+        """Get prompt template for a message type (cached; empty results included)."""
         return self.get(f'prompt_templates.{message_type}.{template_type}', '')
     
+    @lru_cache(maxsize=32)
+    def get_compiled_prompt_template(self, message_type: str, template_type: str) -> Template:
+        """Get a prompt template compiled once for single-pass substitution."""
+        return compile_prompt_template(self.get_prompt_template(message_type, template_type))
+    
     def get_general_setting(self, key: str, default: Any = None) -> Any:
         """Get general setting."""
         return self.get(f'general.{key}', default)
@@ -3,7 +3,6 @@
 from typing import Union
 
 from providers.huggingface_llm import HuggingFaceLLM
-from providers.local_transformers_llm import LocalTransformersLLM
 from utils.config import config
 from utils.utils import get_logger
 from utils.types import LLMProtocol
@@ -11,6 +10,12 @@ from utils.types import LLMProtocol
 logger = get_logger(__name__)
 
 
+def _local_llm(model_id: str) -> LLMProtocol:
+    """Create a local transformers LLM, importing transformers only when needed."""
+    from providers.local_transformers_llm import LocalTransformersLLM
+    return LocalTransformersLLM(model_id=model_id)
+
+
 def create_llm() -> LLMProtocol:
     """Create the appropriate LLM instance based on configuration.
     
@@ -24,19 +29,19 @@ def create_llm() -> LLMProtocol:
     if "gpt-oss" in model_id.lower():
         logger.info("Using local transformers for GPT-OSS model", model_id=model_id)
         try:
-            return LocalTransformersLLM(model_id=model_id)
+            return _local_llm(model_id)
         except Exception as e:
             logger.error(f"Failed to load GPT-OSS model: {e}")
             logger.info("Falling back to smaller model for compatibility")
             # Fallback to a smaller, more compatible model
             fallback_model = "microsoft/DialoGPT-medium"
             logger.info(f"Using fallback model: {fallback_model}")
-            return LocalTransformersLLM(model_id=fallback_model)
+            return _local_llm(fallback_model)
     
     # Use local transformers if API key is 'local' or invalid
     if api_key == "local" or api_key == "your_valid_hf_api_key_here":
         logger.info("Using local transformers LLM", model_id=model_id)
-        return LocalTransformersLLM(model_id=model_id)
+        return _local_llm(model_id)
     
     # Try to use HuggingFace API
     logger.info("Using HuggingFace API LLM", model_id=model_id)
@@ -60,12 +65,12 @@ def create_llm_with_fallback() -> LLMProtocol:
     # If explicitly set to local, use local transformers
     if api_key == "local":
         logger.info("Using local transformers LLM (explicit)", model_id=model_id)
-        return LocalTransformersLLM(model_id=model_id)
+        return _local_llm(model_id)
     
     # If API key looks invalid, use local transformers
     if api_key == "your_valid_hf_api_key_here" or not api_key.startswith("hf_"):
         logger.info("Using local transformers LLM (invalid API key)", model_id=model_id)
-        return LocalTransformersLLM(model_id=model_id)
+        return _local_llm(model_id)
     
     # Try HuggingFace API first
     logger.info("Using HuggingFace API LLM", model_id=model_id)
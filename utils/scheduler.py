@@ -3,10 +3,11 @@
 import asyncio
 from datetime import date, datetime, time, timedelta
 from typing import Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
 
+import numpy as np
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
-from pytz import timezone
 
 from .compose import MessageComposer, create_message_composer
 from .compose_refactored import create_message_composer_refactored
@@ -15,7 +16,7 @@ from .config import config
 from providers import TwilioWhatsApp, MetaWhatsApp, UltramsgWhatsApp
 from .storage import Storage
 from .utils import (
-    SeededRandom, get_date_seed, get_logger,
+    get_date_seed, get_logger,
     get_timezone_aware_datetime, is_within_time_window
 )
 
@@ -27,6 +28,7 @@ class MessageScheduler:
     
     def __init__(self):
         self.scheduler = AsyncIOScheduler()
+        self._tz = ZoneInfo(config.settings.timezone)
         self.storage = Storage()
         self.messenger = self._create_messenger()
         
@@ -88,14 +90,11 @@ class MessageScheduler:
     
     def _now_tz(self) -> datetime:
         """Get current timezone-aware datetime."""
-        tz = timezone(config.settings.timezone)
-        return datetime.now(tz)
+        return datetime.now(self._tz)
     
     def _localize_dt(self, date_obj: date, hh: int, mm: int) -> datetime:
         """Create timezone-aware datetime from date and time components."""
-        tz = timezone(config.settings.timezone)
-        dt = datetime.combine(date_obj, time(hh, mm))
-        return tz.localize(dt)
+        return datetime.combine(date_obj, time(hh, mm), tzinfo=self._tz)
     
     def _slot_for_time(self, t: time) -> Optional[str]:
         """Determine which message slot a time falls into."""
@@ -214,6 +213,14 @@ class MessageScheduler:
         self.scheduler.shutdown()
         logger.info("Message scheduler stopped")
     
+    async def close(self):
+        """Close the messenger's and LLM's persistent HTTP clients."""
+        await self.messenger.close()
+        # Local LLMs hold no connections and have no close()
+        close_llm = getattr(self.llm, "close", None)
+        if close_llm is not None:
+            await close_llm()
+    
     async def _plan_daily_messages(self):
         """Plan and schedule messages for the current day."""
         try:
@@ -253,6 +260,9 @@ class MessageScheduler:
                         job_id=job_id
                     )
             
+            # Pick the day's songs in one batched recommender pass
+            await self.composer.plan_daily_songs(today)
+            
         except Exception as e:
             logger.error(f"Error planning daily messages: {e}")
     
@@ -260,31 +270,22 @@ class MessageScheduler:
         """Generate randomized times for each message type on a given date."""
         # Use seeded random for consistent times per day
         seed = get_date_seed(date_obj)
-        rng = SeededRandom(seed)
+        rng = np.random.default_rng(seed)
         
         times = {}
-        tz = timezone(config.settings.timezone)
         
-        for message_type, (start_time, end_time) in self.message_windows.items():
-            # Generate random time within window
-            start_minutes = start_time.hour * 60 + start_time.minute
-            end_minutes = end_time.hour * 60 + end_time.minute
-            
-            if end_minutes < start_minutes:  # Window spans midnight
-                end_minutes += 24 * 60
-            
-            random_minutes = rng.randint(start_minutes, end_minutes)
-            
-            # Add jitter (±20 minutes)
-            jitter = rng.randint(-20, 20)
-            random_minutes += jitter
-            
-            # Normalize to 24-hour format
-            random_minutes = max(0, min(random_minutes, 24 * 60 - 1))
-            
-            # Convert to datetime
-            hour = random_minutes // 60
-            minute = random_minutes % 60
+        # Window bounds in minutes since midnight, one entry per message type
+        windows = self.message_windows.values()
+        starts = np.array([start.hour * 60 + start.minute for start, _ in windows])
+        ends = np.array([end.hour * 60 + end.minute for _, end in windows])
+        ends = np.where(ends < starts, ends + 24 * 60, ends)  # Window spans midnight
+        
+        # Draw all times and jitters (±20 minutes) in one go, then clamp to the day
+        minutes = rng.integers(starts, ends + 1) + rng.integers(-20, 21, size=len(starts))
+        np.clip(minutes, 0, 24 * 60 - 1, out=minutes)
+        
+        for message_type, random_minutes in zip(self.message_windows, minutes.tolist()):
+            hour, minute = divmod(random_minutes, 60)
             
             # Create datetime in target timezone
             dt = self._localize_dt(date_obj, hour, minute)
@@ -3,7 +3,7 @@
 import sqlite3
 from datetime import date, datetime
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from utils import get_logger
 
@@ -68,6 +68,20 @@ class Storage:
                 )
             """)
             
+            # Songs picked ahead of time for each slot of a day
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS planned_songs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    date TEXT NOT NULL,
+                    slot TEXT NOT NULL,
+                    song_id TEXT NOT NULL,
+                    song_title TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    UNIQUE(date, slot)
+                )
+            """)
+            
             # Create indexes for faster lookups
             conn.execute("""
                 CREATE INDEX IF NOT EXISTS idx_messages_date_slot 
@@ -357,3 +371,59 @@ class Storage:
         except Exception as e:
             logger.error(f"Failed to get recent song IDs: {e}")
             return set()
+    
+    def save_planned_song(
+        self,
+        date_obj: date,
+        slot: str,
+        song_id: str,
+        song_title: str,
+        url: str
+    ) -> None:
+        """Save the song planned for a date and slot; an existing plan is kept."""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute("""
+                    INSERT OR IGNORE INTO planned_songs 
+                    (date, slot, song_id, song_title, url, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, (
+                    date_obj.isoformat(),
+                    slot,
+                    song_id,
+                    song_title,
+                    url,
+                    datetime.now().isoformat()
+                ))
+                conn.commit()
+                
+        except Exception as e:
+            logger.error(
+                "Failed to save planned song",
+                date=date_obj.isoformat(),
+                slot=slot,
+                error=str(e)
+            )
+    
+    def get_planned_song(self, date_obj: date, slot: str) -> Optional[Dict[str, str]]:
+        """Get the song planned for a date and slot, if any."""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.execute("""
+                    SELECT song_id, song_title, url FROM planned_songs 
+                    WHERE date = ? AND slot = ?
+                """, (date_obj.isoformat(), slot))
+                
+                row = cursor.fetchone()
+                if not row:
+                    return None
+                return {"song_id": row[0], "title": row[1], "url": row[2]}
+                
+        except Exception as e:
+            logger.error(
+                "Failed to get planned song",
+                date=date_obj.isoformat(),
+                slot=slot,
+                error=str(e)
+            )
+            return None
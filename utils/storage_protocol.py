@@ -6,7 +6,7 @@ from datetime import date
 from typing import Optional
 
 from .storage import Storage
-from .types import MessageType, StorageProtocol
+from .types import MessageType, SongRecommendation, StorageProtocol
 
 
 class StorageProtocolImpl(StorageProtocol):
@@ -47,4 +47,29 @@ class StorageProtocolImpl(StorageProtocol):
             return self.storage.get_recent_song_ids(days)
         except Exception:
             # If storage fails, return empty set
-            return set()
\ No newline at end of file
+            return set()
+    
+    def save_planned_song(self, date_obj: date, message_type: MessageType, song: SongRecommendation) -> None:
+        """Save the song planned for a date and message type."""
+        if not self.storage:
+            return
+        
+        try:
+            self.storage.save_planned_song(
+                date_obj, message_type.value, song.song_id, song.title, song.url
+            )
+        except Exception:
+            # If storage fails, the song is picked again at compose time
+            pass
+    
+    def get_planned_song(self, date_obj: date, message_type: MessageType) -> Optional[SongRecommendation]:
+        """Get the song planned for a date and message type, if any."""
+        if not self.storage:
+            return None
+        
+        try:
+            planned = self.storage.get_planned_song(date_obj, message_type.value)
+        except Exception:
+            # If storage fails, treat the slot as unplanned
+            return None
+        return SongRecommendation(**planned) if planned else None
@@ -84,6 +84,14 @@ class StorageProtocol(Protocol):
     def get_recent_song_ids(self, days: int = 30) -> set[str]:
         """Get set of recently recommended song IDs."""
         ...
+    
+    def save_planned_song(self, date_obj: date, message_type: MessageType, song: SongRecommendation) -> None:
+        """Save the song planned for a date and message type."""
+        ...
+    
+    def get_planned_song(self, date_obj: date, message_type: MessageType) -> Optional[SongRecommendation]:
+        """Get the song planned for a date and message type, if any."""
+        ...
 
 
 class LLMProtocol(Protocol):
@@ -96,9 +104,14 @@ class LLMProtocol(Protocol):
         max_new_tokens: int,
         temperature: float,
         top_p: float,
-        do_sample: bool
+        do_sample: bool,
+        message_type: Optional[MessageType] = None
     ) -> Optional[str]:
-        """Generate text using the LLM."""
+        """Generate text using the LLM.
+        
+        ``message_type`` is passed by the composer when it is known; providers
+        may ignore it.
+        """
         ...
 
 
@@ -163,3 +176,11 @@ class NullStorage:
     def get_recent_song_ids(self, days: int = 30) -> set[str]:
         """Return empty set for null storage."""
         return set()
+    
+    def save_planned_song(self, date_obj: date, message_type: MessageType, song: SongRecommendation) -> None:
+        """Do nothing for null storage."""
+        pass
+    
+    def get_planned_song(self, date_obj: date, message_type: MessageType) -> Optional[SongRecommendation]:
+        """Return None for null storage (nothing planned)."""
+        return None
@@ -1,14 +1,39 @@
 """Utility functions for Bubu Agent."""
 
+import asyncio
+import atexit
 import logging
 import os
+import queue
 import random
 import re
 from datetime import datetime, time
-from typing import Optional
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Coroutine, Optional
+from zoneinfo import ZoneInfo
 
 import structlog
-from pytz import timezone
+
+# Background listener that performs the actual log I/O
+_log_listener: Optional[QueueListener] = None
+
+
+def _start_log_listener() -> None:
+    """Move root handlers behind a queue drained by a background thread.
+    
+    Call sites only enqueue records, so stream/disk latency stays off the
+    message send path.
+    """
+    global _log_listener
+    if _log_listener is not None:
+        return
+    
+    root = logging.getLogger()
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    _log_listener = QueueListener(log_queue, *root.handlers, respect_handler_level=True)
+    root.handlers = [QueueHandler(log_queue)]
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
 
 
 def setup_logging(log_level: str = "INFO") -> None:
@@ -18,6 +43,7 @@ def setup_logging(log_level: str = "INFO") -> None:
         stream=open(os.devnull, "w") if log_level == "SILENT" else None,
         level=getattr(logging, log_level.upper()),
     )
+    _start_log_listener()
 
     structlog.configure(
         processors=[
@@ -38,6 +64,20 @@ def setup_logging(log_level: str = "INFO") -> None:
     )
 
 
+def run_async(main: Coroutine[Any, Any, Any]) -> Any:
+    """Run a coroutine to completion on uvloop when it is available.
+    
+    Falls back to asyncio.run when uvloop is not installed. Only the loop
+    created for this call is affected; the global event-loop policy is
+    left alone.
+    """
+    try:
+        import uvloop
+    except ImportError:
+        return asyncio.run(main)
+    return uvloop.run(main)
+
+
 def get_logger(name: str) -> structlog.BoundLogger:
     """Get a structured logger instance."""
     return structlog.get_logger(name)
@@ -77,6 +117,15 @@ class SeededRandom:
         self.seed = seed
         self._rng = random.Random(seed)
     
+    @classmethod
+    def from_state(cls, seed: Optional[int], state: tuple) -> "SeededRandom":
+        """Create a generator at a saved ``random.Random`` state without re-seeding."""
+        rng = cls.__new__(cls)
+        rng.seed = seed
+        rng._rng = random.Random.__new__(random.Random)
+        rng._rng.setstate(state)
+        return rng
+    
     def choice(self, seq):
         """Choose a random element from a sequence."""
         return self._rng.choice(seq)
@@ -102,9 +151,9 @@ def get_date_seed(date_obj: datetime) -> int:
 
 def get_timezone_aware_datetime(dt: datetime, tz_name: str) -> datetime:
     """Convert datetime to timezone-aware datetime."""
-    tz = timezone(tz_name)
+    tz = ZoneInfo(tz_name)
     if dt.tzinfo is None:
-        dt = tz.localize(dt)
+        dt = dt.replace(tzinfo=tz)
     else:
         dt = dt.astimezone(tz)
     return dt
@@ -173,9 +222,9 @@ def validate_message_content(text: str, max_length: int = 300) -> tuple[bool, st
 
 def format_time_for_display(dt: datetime, tz_name: str) -> str:
     """Format datetime for display in specified timezone."""
-    tz = timezone(tz_name)
+    tz = ZoneInfo(tz_name)
     if dt.tzinfo is None:
-        dt = tz.localize(dt)
+        dt = dt.replace(tzinfo=tz)
     else:
         dt = dt.astimezone(tz)
     